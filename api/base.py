@@ -1,17 +1,19 @@
 from typing import List
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
 from api.models import PrefectureOut, CityOut
-from models.administration import City, Prefecture
+from core.database import db_manager
+from core.settings import QUERY_STATS_API
+from models.administration import reference_data
+from models.query_cache import query_cache
 
 
 router = APIRouter(prefix="/api", tags=["base"])
 
 
 @router.get("/prefectures", response_model=List[PrefectureOut])
-def list_prefectures() -> List[PrefectureOut]:
-    prefectures = Prefecture.get_all()
-    prefectures = sorted(prefectures, key=lambda p: p.pref_id or 0)
+async def list_prefectures() -> List[PrefectureOut]:
+    prefectures = (await reference_data.aensure_fresh()).prefectures()
     return [
         PrefectureOut(
             id=p.id,
@@ -25,9 +27,8 @@ def list_prefectures() -> List[PrefectureOut]:
 
 
 @router.get("/cities", response_model=List[CityOut])
-def list_cities(pref_id: int = Query(..., gt=0)) -> List[CityOut]:
-    cities = City.get_by_pref_id(pref_id)
-    cities = sorted(cities, key=lambda c: c.id)
+async def list_cities(pref_id: int = Query(..., gt=0)) -> List[CityOut]:
+    cities = (await reference_data.aensure_fresh()).cities(pref_id)
     return [
         CityOut(
             id=c.id,
@@ -37,4 +38,16 @@ def list_cities(pref_id: int = Query(..., gt=0)) -> List[CityOut]:
             pref_id=c.pref_id,
         )
         for c in cities
-    ]
\ No newline at end of file
+    ]
+
+
+@router.get("/stats/queries", include_in_schema=QUERY_STATS_API)
+async def query_stats(top: int = Query(20, ge=1, le=500)) -> dict:
+    """Query latency per SQL template and per model method, and query cache hit rates, for this API process."""
+    if not QUERY_STATS_API:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "queries": db_manager.query_stats.snapshot(top=top),
+        "pool": db_manager.pool_stats(),
+        "cache": query_cache.stats(),
+    }
@@ -1,117 +1,860 @@
+import asyncio
+import contextvars
+import functools
+import itertools
 import logging
-import mysql.connector
 import threading
+import time
 import os
 
-from typing import Optional, Dict
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Dict
 from contextlib import contextmanager
 from abc import ABC
 
+from core.drivers import DRIVERS, BaseDriver
+from core.query_scope import current_query_scopes
+from core.query_stats import CallerRef, QueryStats
+from core.settings import SLOW_QUERY_LOG_FILE, TMP_ROOT
+
 logging.basicConfig(level=logging.INFO)
 
-# Serialize all mysql.connector.connect() calls to avoid C-extension race/segfault
-# when multiple threads create connections at the same time (e.g. main + worker).
-_CONNECT_LOCK = threading.Lock()
+
+class PoolExhaustedError(RuntimeError):
+    pass
+
+
+# Workloads share the same pools but get separate connection budgets, so a burst of ETL
+# threads cannot starve API requests. Pools, and so budgets, are per process: they bound a
+# workload against the other workloads of the same process, not against the API server or
+# the scheduler running elsewhere. Bounding the scheduler's total load on the database is
+# done by its own <PREFIX>_POOL_SIZE or by the connection limit of its database user.
+# The process default is set once by each entry point; workload() overrides it for a block of code.
+_default_workload: Optional[str] = None
+_current_workload = contextvars.ContextVar("db_workload", default=None)
+
+
+def set_default_workload(name: Optional[str]) -> None:
+    """Tag every connection checkout in this process (all threads) with `name`."""
+    global _default_workload
+    _default_workload = name
+
+
+def current_workload() -> Optional[str]:
+    return _current_workload.get() or _default_workload
+
+
+@contextmanager
+def workload(name: str):
+    """Tag the connection checkouts made inside the block with `name`."""
+    token = _current_workload.set(name)
+    try:
+        yield
+    finally:
+        _current_workload.reset(token)
+
+
+class ConnectionPool:
+    """Bounded, thread-reentrant pool of connections with per-workload budgets and priorities."""
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable,
+        max_size: int,
+        timeout: float,
+        ping: Optional[Callable] = None,
+        idle_check_secs: float = 30,
+        max_lifetime_secs: float = 3600,
+        budgets: Optional[Dict[str, int]] = None,
+        priorities: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.name = name
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.idle_check_secs = idle_check_secs
+        self.max_lifetime_secs = max_lifetime_secs
+        self._connect = connect
+        self._ping = ping
+        # workload -> max concurrent connections / priority (lower wins when slots are scarce)
+        self.budgets = dict(budgets or {})
+        self.priorities = dict(priorities or {})
+
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._idle = deque()
+        # id(conn) -> [conn, owner thread, generation]
+        self._in_use: Dict[int, list] = {}
+        # id(conn) -> monotonic timestamps, used by the liveness policy
+        self._born: Dict[int, float] = {}
+        self._last_used: Dict[int, float] = {}
+        # id(conn) -> per-connection state owned by the manager (e.g. prepared statements)
+        self._state: Dict[int, dict] = {}
+        # slots reserved by threads that are connecting or validating outside the lock
+        self._pending = 0
+        self._generation = 0
+        # workload -> connections checked out or being opened for it
+        self._active: Dict[Optional[str], int] = defaultdict(int)
+        # priority -> threads within their budget that are waiting for a free slot
+        self._waiting: Dict[int, int] = defaultdict(int)
+
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "closed": 0,
+            "reaped": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "pings": 0,
+            "recycled": 0,
+        }
+
+    def _size(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _close(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception as e:
+            logging.warning(f"ConnectionPool({self.name}): Error closing connection: {e}")
+        with self._cond:
+            self._born.pop(id(conn), None)
+            self._last_used.pop(id(conn), None)
+            self._state.pop(id(conn), None)
+            self._stats["closed"] += 1
+
+    def state(self, conn) -> dict:
+        """Scratch space tied to the lifetime of a pooled connection; dropped when it is closed."""
+        with self._cond:
+            return self._state.setdefault(id(conn), {})
+
+    def held(self):
+        return getattr(self._local, "conn", None)
+
+    def acquire(self, workload: Optional[str] = None):
+        conn = self.held()
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        conn = self._checkout(workload or current_workload())
+        self._local.conn = conn
+        self._local.depth = 1
+        self._local.broken = False
+        return conn
+
+    def release(self, discard: bool = False) -> None:
+        conn = self.held()
+        if conn is None:
+            return
+
+        if discard:
+            self._local.broken = True
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        broken = self._local.broken
+        self._local.conn = None
+        self._checkin(conn, broken)
+
+    def acquire_exclusive(self, workload: Optional[str] = None):
+        """Check out a connection that is not bound to the calling thread (e.g. for streaming)."""
+        return self._checkout(workload or current_workload())
+
+    def release_exclusive(self, conn, discard: bool = False) -> None:
+        self._checkin(conn, discard)
+
+    def _outranked(self, priority: int) -> bool:
+        return any(count for p, count in self._waiting.items() if p < priority)
+
+    def _checkout(self, workload: Optional[str] = None):
+        """Wait for a slot within the workload budget, serving higher-priority waiters first."""
+        deadline = time.monotonic() + self.timeout
+        budget = self.budgets.get(workload)
+        priority = self.priorities.get(workload, max(self.priorities.values(), default=0))
+        queued = False
+        conn = None
+        with self._cond:
+            try:
+                while True:
+                    within_budget = budget is None or self._active[workload] < budget
+                    if within_budget and not self._outranked(priority):
+                        if self._idle:
+                            conn = self._idle.pop()
+                            break
+                        if self._size() < self.max_size:
+                            break
+
+                    reaped = self._collect_dead_owners()
+                    if reaped:
+                        self._cond.release()
+                        try:
+                            for dead_conn in reaped:
+                                self._close(dead_conn)
+                        finally:
+                            self._cond.acquire()
+                        continue
+
+                    if within_budget != queued:
+                        self._waiting[priority] += 1 if within_budget else -1
+                        queued = within_budget
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolExhaustedError(
+                            f"ConnectionPool({self.name}): no connection available for workload {workload} "
+                            f"after {self.timeout}s (max_size={self.max_size}, budget={budget})"
+                        )
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+            finally:
+                if queued:
+                    self._waiting[priority] -= 1
+                    # lower-priority waiters may have been holding back for us
+                    self._cond.notify_all()
+
+            self._pending += 1
+            self._active[workload] += 1
+
+        created = False
+        try:
+            if conn is not None:
+                conn = self._revalidate(conn)
+            if conn is None:
+                conn = self._connect()
+                created = True
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._active[workload] -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._pending -= 1
+            if created:
+                self._stats["created"] += 1
+                self._born[id(conn)] = time.monotonic()
+            self._register(conn, workload)
+        return conn
+
+    def _revalidate(self, conn):
+        """Return an idle connection fit for reuse, or None after closing it."""
+        now = time.monotonic()
+        if now - self._born.get(id(conn), now) > self.max_lifetime_secs:
+            reason = "max lifetime reached"
+        elif self._ping and now - self._last_used.get(id(conn), now) > self.idle_check_secs:
+            with self._cond:
+                self._stats["pings"] += 1
+            try:
+                self._ping(conn)
+                return conn
+            except Exception as e:
+                reason = f"ping failed: {e}"
+        else:
+            return conn
+
+        logging.info(f"ConnectionPool({self.name}): Recycling connection ({reason})")
+        with self._cond:
+            self._stats["recycled"] += 1
+        self._close(conn)
+        return None
+
+    def _register(self, conn, workload: Optional[str]) -> None:
+        self._in_use[id(conn)] = [conn, threading.current_thread(), self._generation, workload]
+        self._stats["checkouts"] += 1
+
+    def _checkin(self, conn, broken: bool) -> None:
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+            if entry is not None:
+                self._active[entry[3]] -= 1
+            stale = entry is None or entry[2] != self._generation
+            self._last_used[id(conn)] = time.monotonic()
+            # Waiters differ in budget and priority, so a single notify could wake the wrong one.
+            self._cond.notify_all()
+            if not broken and not stale:
+                self._idle.append(conn)
+                return
+        self._close(conn)
+
+    def _collect_dead_owners(self) -> list:
+        """Must be called with the pool lock held; returns connections to close."""
+        dead = []
+        for key, (conn, owner, _generation, workload) in list(self._in_use.items()):
+            if not owner.is_alive():
+                del self._in_use[key]
+                self._active[workload] -= 1
+                dead.append(conn)
+        if dead:
+            self._stats["reaped"] += len(dead)
+            logging.info(f"ConnectionPool({self.name}): Reaped {len(dead)} connection(s) from dead threads")
+        return dead
+
+    def reap(self) -> int:
+        with self._cond:
+            dead = self._collect_dead_owners()
+            if dead:
+                self._cond.notify_all()
+        for conn in dead:
+            self._close(conn)
+        return len(dead)
+
+    def warm_up(self, min_size: int, workers: int = 1) -> int:
+        """Open connections up to `min_size` with `workers` threads; returns how many were opened."""
+        with self._cond:
+            missing = max(0, min(min_size, self.max_size) - self._size())
+            self._pending += missing
+            generation = self._generation
+        if not missing:
+            return 0
+
+        opened = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, missing)), thread_name_prefix=f"{self.name}-warmup") as executor:
+            futures = [executor.submit(self._connect) for _ in range(missing)]
+            for future in futures:
+                try:
+                    conn = future.result()
+                except Exception as e:
+                    logging.error(f"ConnectionPool({self.name}): Warm-up connection failed: {e}")
+                    with self._cond:
+                        self._pending -= 1
+                        self._cond.notify_all()
+                    continue
+
+                with self._cond:
+                    self._pending -= 1
+                    if generation != self._generation:
+                        stale = True
+                    else:
+                        stale = False
+                        now = time.monotonic()
+                        self._born[id(conn)] = now
+                        self._last_used[id(conn)] = now
+                        self._stats["created"] += 1
+                        self._idle.append(conn)
+                        self._cond.notify_all()
+                        opened += 1
+                if stale:
+                    self._close(conn)
+        return opened
+
+    def close_all(self) -> None:
+        """Close idle connections now; connections in use are closed when returned."""
+        with self._cond:
+            self._generation += 1
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self) -> Dict:
+        self.reap()
+        with self._cond:
+            return {
+                "name": self.name,
+                "max_size": self.max_size,
+                "size": self._size(),
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "active_by_workload": {str(k): v for k, v in self._active.items() if v},
+                "budgets": dict(self.budgets),
+                **self._stats,
+            }
 
 
 class BaseDBManager(ABC):
-    
-    def __init__(self, config_prefix: str) -> None:
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_POOL_MIN_SIZE = 0
+    DEFAULT_POOL_TIMEOUT = 30
+    DEFAULT_IDLE_CHECK_SECS = 30
+    DEFAULT_MAX_LIFETIME_SECS = 3600
+    DEFAULT_STATEMENT_CACHE_SIZE = 64
+    # Threads running queries for async callers; 0 means one per pooled connection.
+    DEFAULT_ASYNC_WORKERS = 0
+    # Statements at least this slow go to the slow-query log; 0 disables it.
+    DEFAULT_SLOW_QUERY_MS = 200
+    # Share of statements query_stats attributes to their model method; slow ones always are.
+    DEFAULT_QUERY_STATS_CALLER_SAMPLE = 0.01
+    # How long a replica that failed is skipped before it is tried again.
+    REPLICA_RETRY_SECS = 30
+
+    # workload -> max connections it may hold per pool; unlisted workloads are only bound by the pool size
+    DEFAULT_WORKLOAD_BUDGETS: Dict[str, int] = {}
+    # lower is served first when connections are scarce
+    WORKLOAD_PRIORITIES = {"api": 0, "cron": 1, "etl": 2}
+
+    READ_PREFIXES = ("SELECT", "WITH", "SHOW", "(SELECT")
+
+    def __init__(self, config_prefix: str, pool_size: Optional[int] = None, pool_timeout: Optional[float] = None) -> None:
         self.config_prefix = config_prefix
-        self._connection_pool = {}
-        self._pool_lock = threading.Lock()
 
+        self._driver = self._load_driver()
         self._config = self._load_config()
+        pool_config = self._load_pool_config()
+        pool_size = pool_size or pool_config["pool_size"]
+        pool_timeout = pool_timeout or pool_config["pool_timeout"]
+        self._min_pool_size = pool_config["pool_min_size"]
+
+        self._pool = self._create_pool(config_prefix, self._config, pool_size, pool_timeout, pool_config)
+        # Each replica: {"pool": ConnectionPool, "down_until": monotonic timestamp}
+        self._replicas = [
+            {
+                "pool": self._create_pool(f"{config_prefix}-replica-{i}", config, pool_size, pool_timeout, pool_config),
+                "down_until": 0.0,
+            }
+            for i, config in enumerate(self._load_replica_configs())
+        ]
+        self._replica_cursor = itertools.count()
+        self._primary_reads = contextvars.ContextVar(f"{config_prefix}_primary_reads", default=False)
+        self._local = threading.local()
 
+        self.statement_cache_size = pool_config["statement_cache_size"]
+        self._statement_stats = {"prepared": 0, "reused": 0, "evicted": 0}
+        self._statement_stats_lock = threading.Lock()
+
+        self._async_workers = pool_config["async_workers"] or pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        self.query_stats = QueryStats(
+            name=config_prefix,
+            enabled=pool_config["query_stats"],
+            slow_ms=pool_config["slow_query_ms"],
+            slow_log_file=SLOW_QUERY_LOG_FILE,
+            caller_sample=pool_config["query_stats_caller_sample"],
+        )
+
+    def _load_driver(self) -> BaseDriver:
+        engine = os.getenv(f'{self.config_prefix}_ENGINE', 'mysql').lower()
+        if engine not in DRIVERS:
+            raise ValueError(f"Unsupported {self.config_prefix}_ENGINE '{engine}', expected one of {list(DRIVERS)}")
+        return DRIVERS[engine]()
+
+    @property
+    def engine(self) -> str:
+        return self._driver.name
 
     def _load_config(self) -> Dict:
+        if self.engine == "sqlite":
+            return {
+                'path': os.getenv(f'{self.config_prefix}_SQLITE_PATH', str(TMP_ROOT / f"{self.config_prefix.lower()}.sqlite3")),
+                'readonly': os.getenv(f'{self.config_prefix}_SQLITE_READONLY', '0') == '1',
+            }
         return {
             'host': os.getenv(f'{self.config_prefix}_HOST', 'localhost'),
             'user': os.getenv(f'{self.config_prefix}_USER', 'root'),
             'password': os.getenv(f'{self.config_prefix}_PASSWORD', ''),
             'database': os.getenv(f'{self.config_prefix}_DATABASE', ''),
             'port': int(os.getenv(f'{self.config_prefix}_PORT', 3306)),
+            'use_pure': os.getenv(f'{self.config_prefix}_USE_PURE', '0') == '1',
+        }
+
+    def _load_replica_configs(self) -> List[Dict]:
+        """Replicas from `<PREFIX>_REPLICA_HOSTS=host1[:port],...`, defaulting to the primary credentials."""
+        if self.engine != "mysql":
+            return []
+
+        hosts = os.getenv(f'{self.config_prefix}_REPLICA_HOSTS', '')
+        if not hosts and os.getenv(f'{self.config_prefix}_REPLICA_HOST'):
+            hosts = f"{os.getenv(f'{self.config_prefix}_REPLICA_HOST')}:{os.getenv(f'{self.config_prefix}_REPLICA_PORT', '')}"
+
+        configs = []
+        for entry in hosts.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            host, _, port = entry.partition(":")
+            configs.append({
+                'host': host,
+                'user': os.getenv(f'{self.config_prefix}_REPLICA_USER', self._config['user']),
+                'password': os.getenv(f'{self.config_prefix}_REPLICA_PASSWORD', self._config['password']),
+                'database': os.getenv(f'{self.config_prefix}_REPLICA_DATABASE', self._config['database']),
+                'port': int(port or self._config['port']),
+                'use_pure': self._config['use_pure'],
+            })
+        return configs
+
+    def _load_pool_config(self) -> Dict:
+        return {
+            'pool_size': int(os.getenv(f'{self.config_prefix}_POOL_SIZE', self.DEFAULT_POOL_SIZE)),
+            'pool_min_size': int(os.getenv(f'{self.config_prefix}_POOL_MIN_SIZE', self.DEFAULT_POOL_MIN_SIZE)),
+            'pool_timeout': float(os.getenv(f'{self.config_prefix}_POOL_TIMEOUT', self.DEFAULT_POOL_TIMEOUT)),
+            'idle_check_secs': float(os.getenv(f'{self.config_prefix}_POOL_IDLE_CHECK_SECS', self.DEFAULT_IDLE_CHECK_SECS)),
+            'max_lifetime_secs': float(
+                os.getenv(f'{self.config_prefix}_POOL_MAX_LIFETIME_SECS', self.DEFAULT_MAX_LIFETIME_SECS)
+            ),
+            'statement_cache_size': int(
+                os.getenv(f'{self.config_prefix}_STATEMENT_CACHE_SIZE', self.DEFAULT_STATEMENT_CACHE_SIZE)
+            ),
+            'workload_budgets': self._load_workload_budgets(),
+            'async_workers': int(os.getenv(f'{self.config_prefix}_ASYNC_WORKERS', self.DEFAULT_ASYNC_WORKERS)),
+            'query_stats': os.getenv(f'{self.config_prefix}_QUERY_STATS', '1') == '1',
+            'slow_query_ms': float(os.getenv(f'{self.config_prefix}_SLOW_QUERY_MS', self.DEFAULT_SLOW_QUERY_MS)),
+            'query_stats_caller_sample': float(
+                os.getenv(f'{self.config_prefix}_QUERY_STATS_CALLER_SAMPLE', self.DEFAULT_QUERY_STATS_CALLER_SAMPLE)
+            ),
         }
 
+    def _load_workload_budgets(self) -> Dict[str, int]:
+        """`<PREFIX>_WORKLOAD_BUDGETS=api:8,etl:4,cron:2` overrides the class defaults per workload."""
+        budgets = dict(self.DEFAULT_WORKLOAD_BUDGETS)
+        for entry in os.getenv(f'{self.config_prefix}_WORKLOAD_BUDGETS', '').split(","):
+            name, _, size = entry.strip().partition(":")
+            if not name:
+                continue
+            if not size.strip().isdigit():
+                raise ValueError(f"Invalid {self.config_prefix}_WORKLOAD_BUDGETS entry '{entry}', expected <workload>:<size>")
+            budgets[name] = int(size)
+        return budgets
+
     def set_config(self, config: dict) -> None:
         self._config.update(config)
         self.close_all_connections()
 
-    def get_connection(self, thread_id: Optional[int] = None):
-        if thread_id is None:
-            thread_id = threading.get_ident()
+    def _create_pool(self, name: str, config: Dict, pool_size: int, pool_timeout: float, pool_config: Dict) -> ConnectionPool:
+        return ConnectionPool(
+            name=name,
+            connect=lambda: self._create_connection(config),
+            max_size=pool_size,
+            timeout=pool_timeout,
+            ping=self._ping_connection,
+            idle_check_secs=pool_config["idle_check_secs"],
+            max_lifetime_secs=pool_config["max_lifetime_secs"],
+            budgets={name: min(size, pool_size) for name, size in pool_config["workload_budgets"].items()},
+            priorities=self.WORKLOAD_PRIORITIES,
+        )
+
+    def _create_connection(self, config: Dict):
+        try:
+            conn = self._driver.connect(config)
+            logging.info(
+                f"{self.__class__.__name__}: Created new {self.engine} connection for thread {threading.get_ident()} "
+                f"(config_prefix={self.config_prefix}, host={config.get('host') or config.get('path')})"
+            )
+            return conn
+        except Exception as e:
+            logging.error(
+                f"{self.__class__.__name__}: Failed to create database connection for thread {threading.get_ident()}: {e}"
+            )
+            raise
+
+    def _ping_connection(self, conn) -> None:
+        self._driver.ping(conn)
+
+    def _is_disconnect(self, error: Exception) -> bool:
+        return isinstance(error, self._driver.disconnect_errors)
+
+    def upsert_clause(self, key_columns: List[str], update_columns: List[str]) -> str:
+        return self._driver.upsert_clause(key_columns, update_columns)
 
-        with self._pool_lock:
-            if thread_id not in self._connection_pool:
+    def consecutive_insert_ids(self) -> bool:
+        """Whether a multi-row INSERT on the primary gets an unbroken run of ids (see inserted_ids())."""
+        conn = self._pool.acquire()
+        try:
+            return self._driver.consecutive_insert_ids(conn)
+        finally:
+            self._pool.release()
+
+    def inserted_ids(self, cursor, count: int) -> List[int]:
+        """Ids of the `count` rows the INSERT just run on `cursor` (from get_cursor()) added."""
+        return self._driver.inserted_ids(cursor, count)
+
+    def in_transaction(self) -> bool:
+        """Whether this thread is inside transaction() or a get_cursor() block on the primary."""
+        return self._pool.held() is not None
+
+    def _is_read_query(self, query: str) -> bool:
+        return query.lstrip().upper().startswith(self.READ_PREFIXES)
+
+    def get_connection(self):
+        """Check out a connection; every call must be paired with release_connection()."""
+        return self._pool.acquire()
+
+    def release_connection(self, discard: bool = False) -> None:
+        self._pool.release(discard=discard)
+
+    @contextmanager
+    def transaction(self, commit_every: Optional[int] = None):
+        """Run the block as one transaction on the primary, committed on exit or every `commit_every` writes."""
+        conn = self._pool.acquire()
+        if conn.in_transaction:
+            try:
+                yield
+            finally:
+                self._pool.release()
+            return
+
+        broken = False
+        # after_commit callbacks, deduplicated in call order; dropped on rollback.
+        unit = {"commit_every": commit_every, "pending": 0, "after_commit": {}}
+        self._local.unit = unit
+        try:
+            conn.start_transaction()
+            yield
+            conn.commit()
+            self._run_after_commit(unit)
+        except BaseException as e:
+            broken = self._is_disconnect(e)
+            if not broken:
                 try:
-                    with _CONNECT_LOCK:
-                        conn = mysql.connector.connect(**self._config)
-                    self._connection_pool[thread_id] = conn
-                    logging.info(
-                        f"{self.__class__.__name__}: Created new database connection for thread {thread_id} "
-                        f"(config_prefix={self.config_prefix})"
-                    )
-                    return conn
-                except Exception as e:
-                    logging.error(
-                        f"{self.__class__.__name__}: Failed to create database connection for thread {thread_id}: {e}"
-                    )
-                    raise
+                    conn.rollback()
+                except Exception as rollback_error:
+                    broken = self._is_disconnect(rollback_error)
+            logging.error(f"{self.__class__.__name__}: Transaction rolled back: {e!r}")
+            raise
+        finally:
+            self._local.unit = None
+            self._pool.release(discard=broken)
+
+    def _count_unit_write(self, conn) -> None:
+        unit = getattr(self._local, "unit", None)
+        if not unit or not unit["commit_every"] or not conn.in_transaction:
+            return
+
+        unit["pending"] += 1
+        if unit["pending"] >= unit["commit_every"]:
+            conn.commit()
+            self._run_after_commit(unit)
+            conn.start_transaction()
+            unit["pending"] = 0
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Run `callback` once the open transaction() commits, never if it rolls back; at once outside one."""
+        unit = getattr(self._local, "unit", None)
+        if unit is None:
+            callback()
+        else:
+            unit["after_commit"][callback] = None
 
-            conn = self._connection_pool[thread_id]
+    def _run_after_commit(self, unit: Dict) -> None:
+        callbacks = list(unit["after_commit"])
+        unit["after_commit"].clear()
+        for callback in callbacks:
             try:
-                conn.ping(reconnect=True)
+                callback()
             except Exception as e:
-                old_conn = conn
-                try:
-                    with _CONNECT_LOCK:
-                        conn = mysql.connector.connect(**self._config)
-                    self._connection_pool[thread_id] = conn
-                    logging.info(
-                        f"{self.__class__.__name__}: Reconnected for thread {thread_id} (config_prefix={self.config_prefix})"
-                    )
-                finally:
-                    try:
-                        old_conn.close()
-                    except Exception:
-                        pass
-            return conn
-    
+                logging.error(f"{self.__class__.__name__}: after_commit callback {callback!r} failed: {e}")
+
+    @contextmanager
+    def read_from_primary(self):
+        """Read-your-writes: route every read in this context to the primary."""
+        token = self._primary_reads.set(True)
+        try:
+            yield
+        finally:
+            self._primary_reads.reset(token)
+
+    def _read_pool(self) -> ConnectionPool:
+        """A healthy replica in turn, or the primary for read-your-writes and held connections."""
+        if not self._replicas or self._primary_reads.get() or self._pool.held() is not None:
+            return self._pool
+
+        now = time.monotonic()
+        for _ in range(len(self._replicas)):
+            replica = self._replicas[next(self._replica_cursor) % len(self._replicas)]
+            if replica["down_until"] <= now:
+                return replica["pool"]
+        return self._pool
+
+    def _mark_unhealthy(self, pool: ConnectionPool, error: Exception) -> None:
+        for replica in self._replicas:
+            if replica["pool"] is pool:
+                replica["down_until"] = time.monotonic() + self.REPLICA_RETRY_SECS
+                logging.warning(
+                    f"{self.__class__.__name__}: Replica {pool.name} marked down for {self.REPLICA_RETRY_SECS}s: {error}"
+                )
+
+    def warm_up(self, min_size: Optional[int] = None) -> int:
+        """Open the minimum pool size on the primary and every replica, within the workload budget."""
+        if min_size is None:
+            min_size = self._min_pool_size
+        budget = self._pool.budgets.get(current_workload())
+        if budget is not None:
+            min_size = min(min_size, budget)
+        if min_size <= 0:
+            return 0
+
+        started = time.perf_counter()
+        workers = min_size if self._driver.parallel_connect(self._config) else 1
+        opened = self._pool.warm_up(min_size, workers=workers)
+        for replica in self._replicas:
+            opened += replica["pool"].warm_up(min_size, workers=workers)
+        logging.info(
+            f"{self.__class__.__name__}: Warmed up {opened} connection(s) in {time.perf_counter() - started:.3f}s "
+            f"(config_prefix={self.config_prefix}, workers={workers})"
+        )
+        return opened
+
     def close_all_connections(self) -> None:
-        with self._pool_lock:
-            for thread_id, conn in list(self._connection_pool.items()):
-                try:
-                    conn.close()
-                except Exception as e:
-                    logging.warning(f"{self.__class__.__name__}: Error closing connection for thread {thread_id}: {e}")
-                del self._connection_pool[thread_id]
-            logging.info(f"{self.__class__.__name__}: Closed all database connections")
-    
+        self._pool.close_all()
+        for replica in self._replicas:
+            replica["pool"].close_all()
+        logging.info(f"{self.__class__.__name__}: Closed all database connections")
+
+    def pool_stats(self) -> Dict:
+        stats = self._pool.stats()
+        if self._replicas:
+            stats["replicas"] = [
+                {**replica["pool"].stats(), "healthy": replica["down_until"] <= time.monotonic()}
+                for replica in self._replicas
+            ]
+        return stats
+
+    def statement_cache_stats(self) -> Dict:
+        with self._statement_stats_lock:
+            return {"max_size": self.statement_cache_size, **self._statement_stats}
+
+    def _count_statement(self, event: str, n: int = 1) -> None:
+        with self._statement_stats_lock:
+            self._statement_stats[event] += n
+
+    def _get_prepared_cursor(self, pool: ConnectionPool, conn, query: str):
+        """The connection's cached prepared cursor for `query`, one per template."""
+        statements: OrderedDict = pool.state(conn).setdefault("statements", OrderedDict())
+        cursor = statements.get(query)
+        if cursor is not None:
+            statements.move_to_end(query)
+            self._count_statement("reused")
+            return cursor
+
+        cursor = conn.cursor(prepared=True)
+        statements[query] = cursor
+        self._count_statement("prepared")
+        while len(statements) > self.statement_cache_size:
+            _, evicted = statements.popitem(last=False)
+            self._count_statement("evicted")
+            try:
+                evicted.close()
+            except Exception:
+                pass
+        return cursor
+
+    def _evict_prepared_cursor(self, pool: ConnectionPool, conn, query: str) -> None:
+        cursor = pool.state(conn).get("statements", {}).pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def get_cursor(self, commit: bool = True, readonly: bool = False):
+        """Yield a primary cursor; `commit=True` wraps the block in a transaction, `readonly=True` skips it."""
+        return self._cursor(self._pool, commit=commit, readonly=readonly)
+
     @contextmanager
-    def get_cursor(self, commit: bool = True, thread_id: Optional[int] = None):
-        conn = self.get_connection(thread_id)
+    def _cursor(self, pool: ConnectionPool, commit: bool, readonly: bool):
+        conn = pool.acquire()
         cursor = None
+        broken = False
+        owns_transaction = False
         try:
+            if commit and not readonly and not conn.in_transaction:
+                conn.start_transaction()
+                owns_transaction = True
+
             cursor = conn.cursor()
             yield cursor
 
             if cursor.with_rows:
                 cursor.fetchall()
 
-            if commit:
+            if owns_transaction:
                 conn.commit()
-                
+            elif not readonly:
+                self._count_unit_write(conn)
+
         except Exception as e:
-            if conn:
-                conn.rollback()
-            logging.error(f"Failed to get cursor for thread {thread_id}: {e}")
+            broken = self._is_disconnect(e)
+            if owns_transaction and not broken:
+                try:
+                    conn.rollback()
+                except Exception as rollback_error:
+                    broken = self._is_disconnect(rollback_error)
+            logging.error(f"Failed to get cursor for thread {threading.get_ident()}: {e}")
             raise
         finally:
             if cursor:
-                cursor.close()
+                try:
+                    cursor.close()
+                except Exception:
+                    broken = True
+            pool.release(discard=broken)
+
+    def execute_query(
+        self,
+        query: str,
+        params: tuple = None,
+        fetch_one: bool = False,
+        fetch_all: bool = False,
+        readonly: Optional[bool] = None,
+        prepared: bool = False,
+    ):
+        """Run a single statement, timed into query_stats and counted by the active query_scope()s."""
+        scopes = current_query_scopes()
+        if not self.query_stats.enabled and not scopes:
+            return self._run_query(query, params, fetch_one, fetch_all, readonly, prepared)
+
+        started = time.perf_counter()
+        result = self._run_query(query, params, fetch_one, fetch_all, readonly, prepared)
+        elapsed = time.perf_counter() - started
+        caller = CallerRef()
+        for scope in scopes:
+            scope.record(query, caller)
+        if not self.query_stats.enabled:
+            return result
+        if fetch_one:
+            rows = 1 if result else 0
+        elif fetch_all:
+            rows = len(result) if result else 0
+        else:
+            rows = max(result[1], 0)
+        self.query_stats.record(query, params, elapsed, rows, caller)
+        return result
+
+    def _run_query(self, query: str, params: tuple, fetch_one: bool, fetch_all: bool, readonly: Optional[bool], prepared: bool):
+        is_read = (fetch_one or fetch_all) and self._is_read_query(query)
+        if readonly is None:
+            readonly = is_read
+        execute = self._execute_prepared if prepared and is_read and self.statement_cache_size > 0 else self._execute_query
+
+        pool = self._read_pool() if is_read and readonly else self._pool
+        # A read that is not part of an outer unit of work can safely be replayed on a
+        # fresh connection (or another server) when the pooled one turns out to be dead.
+        retryable = is_read and pool.held() is None
+        try:
+            return execute(pool, query, params, fetch_one, fetch_all, readonly)
+        except Exception as e:
+            if not retryable or not self._is_disconnect(e):
+                raise
+            self._mark_unhealthy(pool, e)
+            logging.warning(f"{self.__class__.__name__}: Connection lost during read, retrying once: {e}")
+            pool = self._read_pool() if readonly else self._pool
+            return execute(pool, query, params, fetch_one, fetch_all, readonly)
+
+    def _execute_prepared(self, pool: ConnectionPool, query: str, params: tuple, fetch_one: bool, fetch_all: bool, readonly: bool):
+        conn = pool.acquire()
+        broken = False
+        try:
+            cursor = self._get_prepared_cursor(pool, conn, query)
+            cursor.execute(query, params or ())
+            rows = cursor.fetchall()
+            if fetch_one:
+                return rows[0] if rows else None
+            return rows
+        except Exception as e:
+            broken = self._is_disconnect(e)
+            self._evict_prepared_cursor(pool, conn, query)
+            logging.error(f"Failed to execute prepared statement for thread {threading.get_ident()}: {e}")
+            raise
+        finally:
+            pool.release(discard=broken)
 
-    def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = False):
-        with self.get_cursor() as cursor:
+    def _execute_query(self, pool: ConnectionPool, query: str, params: tuple, fetch_one: bool, fetch_all: bool, readonly: bool):
+        with self._cursor(pool, commit=False, readonly=readonly) as cursor:
             cursor.execute(query, params or ())
             if fetch_one:
                 row = cursor.fetchone()
@@ -123,22 +866,104 @@ class BaseDBManager(ABC):
             else:
                 return cursor.lastrowid, cursor.rowcount
 
+    def iter_query(self, query: str, params: tuple = None, batch_size: int = 1000) -> Iterator[tuple]:
+        """Stream the rows of a SELECT on a dedicated connection, `batch_size` rows per fetch."""
+        if self._read_pool().held() is not None:
+            # A second connection would count against the workload budget twice; read buffered on this one.
+            yield from self.execute_query(query, params, fetch_all=True, readonly=True) or ()
+            return
+
+        scopes = current_query_scopes()
+        if scopes:
+            caller = CallerRef()
+            for scope in scopes:
+                scope.record(query, caller)
+
+        pool = self._read_pool()
+        conn = pool.acquire_exclusive()
+        cursor = None
+        exhausted = False
+        broken = False
+        try:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            exhausted = True
+        except Exception as e:
+            broken = self._is_disconnect(e)
+            logging.error(f"{self.__class__.__name__}: Failed to stream query: {e}")
+            raise
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    broken = True
+            pool.release_exclusive(conn, discard=broken or not exhausted)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._async_workers, thread_name_prefix=f"{self.config_prefix}-async"
+                    )
+        return self._executor
+
+    async def run_async(self, func: Callable, *args, **kwargs):
+        """Await `func(*args, **kwargs)` on the manager's executor, keeping the caller's context."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+    async def aexecute_query(
+        self,
+        query: str,
+        params: tuple = None,
+        fetch_one: bool = False,
+        fetch_all: bool = False,
+        readonly: Optional[bool] = None,
+        prepared: bool = False,
+    ):
+        """Async variant of execute_query()."""
+        return await self.run_async(
+            self.execute_query, query, params, fetch_one=fetch_one, fetch_all=fetch_all, readonly=readonly, prepared=prepared
+        )
+
+    def shutdown_executor(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
     @property
     def database_name(self) -> str:
+        if self.engine == "sqlite":
+            return os.path.splitext(os.path.basename(self._config['path']))[0]
         return self._config.get('database', '')
 
 
 class DefaultDBManager(BaseDBManager):
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_POOL_MIN_SIZE = 4
+    # Per-process caps: the scheduler's task threads never hold more than 6 of its pool's
+    # connections and a cron script 2, however many threads they run.
+    DEFAULT_WORKLOAD_BUDGETS = {"etl": 6, "cron": 2}
 
-    def __init__(self) -> None:
-        super().__init__(config_prefix="DB")
+    def __init__(self, pool_size: Optional[int] = None, pool_timeout: Optional[float] = None) -> None:
+        super().__init__(config_prefix="DB", pool_size=pool_size, pool_timeout=pool_timeout)
 
 
 class ETLDBManager(BaseDBManager):
+    DEFAULT_POOL_SIZE = 8
 
-    def __init__(self) -> None:
-        super().__init__(config_prefix="ETL")
+    def __init__(self, pool_size: Optional[int] = None, pool_timeout: Optional[float] = None) -> None:
+        super().__init__(config_prefix="ETL", pool_size=pool_size, pool_timeout=pool_timeout)
 
 
 db_manager = DefaultDBManager()
-etl_db_manager = ETLDBManager()
\ No newline at end of file
+etl_db_manager = ETLDBManager()
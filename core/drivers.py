@@ -0,0 +1,250 @@
+import datetime
+import re
+import sqlite3
+import threading
+
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+
+# Serialize mysql.connector.connect() calls that go through the C extension, to avoid a
+# race/segfault when several threads create connections at the same time (e.g. main + worker).
+_CONNECT_LOCK = threading.Lock()
+
+
+class BaseDriver(ABC):
+    """Turns a config dict into a mysql.connector-like connection whose cursors take `%s` placeholders."""
+    name: str = None
+
+    @abstractmethod
+    def connect(self, config: Dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    def ping(self, conn) -> None:
+        raise NotImplementedError
+
+    def parallel_connect(self, config: Dict) -> bool:
+        """Whether several threads may open connections with `config` at the same time."""
+        return True
+
+    @property
+    @abstractmethod
+    def disconnect_errors(self) -> Tuple[type, ...]:
+        """Errors raised when the connection itself is unusable."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_clause(self, key_columns: List[str], update_columns: List[str]) -> str:
+        """Clause appended to a multi-row INSERT so rows whose unique key exists are updated instead."""
+        raise NotImplementedError
+
+    def consecutive_insert_ids(self, conn) -> bool:
+        """Whether the ids one multi-row INSERT generates always form an unbroken run."""
+        return False
+
+    @abstractmethod
+    def inserted_ids(self, cursor, count: int) -> List[int]:
+        """
+        Ids of the `count` rows the INSERT just run on `cursor` added, in VALUES order.
+        Only valid for a single row or when consecutive_insert_ids() holds.
+        """
+        raise NotImplementedError
+
+
+class MySQLDriver(BaseDriver):
+    name = "mysql"
+    # (innodb_autoinc_lock_mode, auto_increment_increment) of the server, read once.
+    _autoinc = None
+
+    def connect(self, config: Dict):
+        import mysql.connector
+
+        # The pure-Python protocol (<PREFIX>_USE_PURE=1) has no shared C state, so only
+        # C-extension connects are serialized.
+        with nullcontext() if self.parallel_connect(config) else _CONNECT_LOCK:
+            # Autocommit lets single statements and plain reads skip the COMMIT round trip;
+            # multi-statement units open an explicit transaction in get_cursor().
+            return mysql.connector.connect(**config, autocommit=True)
+
+    def ping(self, conn) -> None:
+        conn.ping(reconnect=False)
+
+    def parallel_connect(self, config: Dict) -> bool:
+        return bool(config.get("use_pure"))
+
+    @property
+    def disconnect_errors(self) -> Tuple[type, ...]:
+        import mysql.connector.errors
+
+        return (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError)
+
+    def upsert_clause(self, key_columns: List[str], update_columns: List[str]) -> str:
+        # MySQL resolves the conflict against any unique key, so key_columns are implied.
+        # The row alias (MySQL 8.0.19+) replaces VALUES(col), deprecated since 8.0.20.
+        assignments = ", ".join(f"{col} = new.{col}" for col in update_columns) or "id = id"
+        return f"AS new ON DUPLICATE KEY UPDATE {assignments}"
+
+    def _autoinc_settings(self, conn) -> Tuple[int, int]:
+        if self._autoinc is None:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+                mode, step = cursor.fetchone()
+            finally:
+                cursor.close()
+            self._autoinc = (int(mode), int(step))
+        return self._autoinc
+
+    def consecutive_insert_ids(self, conn) -> bool:
+        # "traditional" (0) and "consecutive" (1) reserve a statement's ids in one block;
+        # "interleaved" (2, the MySQL 8 default) lets concurrent INSERTs take ids in between.
+        return self._autoinc_settings(conn)[0] < 2
+
+    def inserted_ids(self, cursor, count: int) -> List[int]:
+        # LAST_INSERT_ID() is the id of the first row of a multi-row INSERT.
+        step = self._autoinc[1] if self._autoinc else 1
+        return [cursor.lastrowid + i * step for i in range(count)]
+
+
+_PLACEHOLDER_RE = re.compile(r"'(?:[^']|'')*'|%s")
+
+
+@lru_cache(maxsize=1024)
+def to_qmark(query: str) -> str:
+    """Rewrite `%s` placeholders to sqlite's `?`, leaving quoted literals alone."""
+    return _PLACEHOLDER_RE.sub(lambda m: "?" if m.group(0) == "%s" else m.group(0), query)
+
+
+# Make sqlite round-trip the types the models get from MySQL (DATETIME/TIMESTAMP -> datetime,
+# DECIMAL -> Decimal); columns are matched on their declared type via PARSE_DECLTYPES.
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DATETIME", lambda raw: datetime.datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()))
+
+
+class SQLiteCursor:
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self._cursor = cursor
+
+    @property
+    def with_rows(self) -> bool:
+        return self._cursor.description is not None
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def execute(self, query: str, params: tuple = ()):
+        return self._cursor.execute(to_qmark(query), tuple(params or ()))
+
+    def executemany(self, query: str, params_list):
+        return self._cursor.executemany(to_qmark(query), params_list)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection with the subset of the mysql.connector API the managers use."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn.in_transaction
+
+    def cursor(self, buffered: bool = True, prepared: bool = False) -> SQLiteCursor:
+        # sqlite3 keeps its own per-connection statement cache, so `prepared` needs no
+        # special cursor, and every cursor already streams rows lazily.
+        return SQLiteCursor(self._conn.cursor())
+
+    def start_transaction(self, **kwargs) -> None:
+        self._conn.execute("BEGIN")
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class SQLiteDriver(BaseDriver):
+    """Embedded single-file backend; config keys `path` and `readonly`, schema from scripts/sql_sqlite."""
+    name = "sqlite"
+    BUSY_TIMEOUT_SECS = 30
+
+    def connect(self, config: Dict) -> SQLiteConnection:
+        path = str(config["path"])
+        # isolation_level=None: autocommit, transactions are opened explicitly like on MySQL.
+        options = {
+            "timeout": self.BUSY_TIMEOUT_SECS,
+            "isolation_level": None,
+            "check_same_thread": False,
+            "detect_types": sqlite3.PARSE_DECLTYPES,
+        }
+        if config.get("readonly"):
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, **options)
+        else:
+            conn = sqlite3.connect(path, **options)
+            # WAL lets the API read while a migrator writes to the same file.
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return SQLiteConnection(conn)
+
+    def ping(self, conn: SQLiteConnection) -> None:
+        conn.cursor().execute("SELECT 1")
+
+    @property
+    def disconnect_errors(self) -> Tuple[type, ...]:
+        return (sqlite3.InterfaceError,)
+
+    def upsert_clause(self, key_columns: List[str], update_columns: List[str]) -> str:
+        target = ", ".join(key_columns)
+        if not update_columns:
+            return f"ON CONFLICT ({target}) DO NOTHING"
+        assignments = ", ".join(f"{col} = excluded.{col}" for col in update_columns)
+        return f"ON CONFLICT ({target}) DO UPDATE SET {assignments}"
+
+    def consecutive_insert_ids(self, conn) -> bool:
+        # Writers are serialized and each new rowid is max(rowid) + 1.
+        return True
+
+    def inserted_ids(self, cursor, count: int) -> List[int]:
+        # sqlite reports the rowid of the last row of a multi-row INSERT.
+        last = cursor.lastrowid
+        return list(range(last - count + 1, last + 1))
+
+
+DRIVERS = {
+    MySQLDriver.name: MySQLDriver,
+    SQLiteDriver.name: SQLiteDriver,
+}
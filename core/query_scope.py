@@ -0,0 +1,90 @@
+import contextvars
+import logging
+import threading
+
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.query_stats import normalize_query
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("query_scopes", default=())
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryScope:
+    """Statements of one unit of work counted per template; `repeat_threshold` repeats flag an N+1."""
+
+    def __init__(self, name: str, budget: Optional[int] = None, repeat_threshold: int = 10) -> None:
+        self.name = name
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        # template -> [count, caller of its first run]
+        self._by_template: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, caller: Callable[[], str]) -> None:
+        template = normalize_query(query)
+        # Only a template's first run walks the stack; repeats just count.
+        first_caller = caller() if template not in self._by_template else None
+        with self._lock:
+            self.count += 1
+            entry = self._by_template.setdefault(template, [0, first_caller])
+            entry[0] += 1
+
+    def repeated(self) -> List[Dict]:
+        """Templates run at least `repeat_threshold` times, most frequent first."""
+        with self._lock:
+            entries = [
+                {"template": template, "count": count, "caller": caller}
+                for template, (count, caller) in self._by_template.items()
+            ]
+        entries = [entry for entry in entries if entry["count"] >= self.repeat_threshold]
+        entries.sort(key=lambda entry: entry["count"], reverse=True)
+        return entries
+
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def stats(self) -> Dict:
+        with self._lock:
+            templates = len(self._by_template)
+        return {
+            "name": self.name,
+            "queries": self.count,
+            "templates": templates,
+            "budget": self.budget,
+            "repeated": self.repeated(),
+        }
+
+
+def current_query_scopes() -> Tuple[QueryScope, ...]:
+    return _current.get()
+
+
+@contextmanager
+def query_scope(name: str, budget: Optional[int] = None, repeat_threshold: int = 10, strict: bool = False):
+    """Count the statements run inside the block and log, or with `strict=True` raise on, repeats and budget overruns."""
+    scope = QueryScope(name, budget=budget, repeat_threshold=repeat_threshold)
+    token = _current.set(_current.get() + (scope,))
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+    for entry in scope.repeated():
+        logging.warning(
+            f"QueryScope({name}): {entry['count']} runs of the same statement, possible N+1 "
+            f"(first from {entry['caller']}): {entry['template'][:200]}"
+        )
+    if scope.over_budget():
+        message = f"QueryScope({name}): {scope.count} queries, over the budget of {scope.budget}"
+        if strict:
+            raise QueryBudgetExceeded(message)
+        logging.warning(message)
+    else:
+        logging.debug(f"QueryScope({name}): {scope.count} queries")
@@ -0,0 +1,189 @@
+import logging
+import random
+import re
+import sys
+import threading
+
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_ROW_LIST_RE = re.compile(r"\(\s*\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))*\s*\)|(?<=VALUES )\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_query(query: str) -> str:
+    """Collapse a statement to its template: literals become `?` and placeholder lists fold to `(...)`."""
+    template = _SPACE_RE.sub(" ", query).strip()
+    template = _LITERAL_RE.sub("?", template)
+    template = _IN_LIST_RE.sub("(...)", template)
+    # Row-constructor and multi-row VALUES lists: ((...), (...)) -> (...)
+    return _ROW_LIST_RE.sub("(...)", template)
+
+
+# Frames in these modules are plumbing between the model method and the driver.
+_PLUMBING_MODULES = frozenset(
+    {__name__, "core.database", "core.query_scope", "contextlib", "functools", "concurrent.futures.thread"}
+)
+_PLUMBING_FUNCTIONS = frozenset({"get_db_results", "aget_db_results", "iter_db_results", "_fetch_rows"})
+
+
+def find_caller(depth: int = 2) -> str:
+    """`module:Class.method` of the first frame outside the database plumbing."""
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        code = frame.f_code
+        if module not in _PLUMBING_MODULES and code.co_name not in _PLUMBING_FUNCTIONS:
+            return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class CallerRef:
+    """find_caller() of one statement, resolved on first use only and shared by its consumers."""
+    __slots__ = ("_caller",)
+
+    def __init__(self) -> None:
+        self._caller: Optional[str] = None
+
+    def __call__(self) -> str:
+        if self._caller is None:
+            self._caller = find_caller()
+        return self._caller
+
+
+class _Timing:
+    """Count, total and a fixed-size reservoir sample of durations for percentiles."""
+    __slots__ = ("count", "total", "max", "rows", "samples")
+
+    RESERVOIR_SIZE = 1024
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples: List[float] = []
+
+    def add(self, elapsed: float, rows: int) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.rows += rows
+        if elapsed > self.max:
+            self.max = elapsed
+        if len(self.samples) < self.RESERVOIR_SIZE:
+            self.samples.append(elapsed)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.RESERVOIR_SIZE:
+                self.samples[slot] = elapsed
+
+    def summary(self) -> Dict:
+        samples = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000 if samples else 0.0
+
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "avg_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": self.max * 1000,
+            "rows": self.rows,
+        }
+
+
+class QueryStats:
+    """Per-template and per-caller latency statistics, with statements slower than `slow_ms` logged."""
+
+    _slow_loggers: Dict[str, logging.Logger] = {}
+    _slow_loggers_lock = threading.Lock()
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        slow_ms: float = 200,
+        slow_log_file: Optional[Path] = None,
+        caller_sample: float = 0.01,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        # Share of statements attributed to their caller; slow statements always are.
+        self.caller_sample = caller_sample
+        # The log file is opened on the first slow statement, not when the manager is created.
+        self._slow_log_file = slow_log_file if slow_ms > 0 else None
+        self._lock = threading.Lock()
+        self._by_template: Dict[str, _Timing] = {}
+        self._by_caller: Dict[Tuple[str, str], _Timing] = {}
+
+    @classmethod
+    def _get_slow_logger(cls, path: Path) -> logging.Logger:
+        with cls._slow_loggers_lock:
+            logger = cls._slow_loggers.get(str(path))
+            if logger is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                logger = logging.getLogger(f"{__name__}.slow.{len(cls._slow_loggers)}")
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                cls._slow_loggers[str(path)] = logger
+            return logger
+
+    def record(self, query: str, params, elapsed: float, rows: int, caller: CallerRef) -> None:
+        template = normalize_query(query)
+        slow = self._slow_log_file is not None and elapsed * 1000 >= self.slow_ms
+        # Walking the stack costs more than the rest of the bookkeeping, so most statements skip it.
+        caller = caller() if slow or random.random() < self.caller_sample else None
+        with self._lock:
+            timing = self._by_template.get(template)
+            if timing is None:
+                timing = self._by_template[template] = _Timing()
+            timing.add(elapsed, rows)
+
+            if caller is not None:
+                timing = self._by_caller.get((caller, template))
+                if timing is None:
+                    timing = self._by_caller[(caller, template)] = _Timing()
+                timing.add(elapsed, rows)
+
+        if slow:
+            self._get_slow_logger(self._slow_log_file).info(
+                f"[{self.name}] {elapsed * 1000:.1f}ms rows={rows} caller={caller} "
+                f"sql={_SPACE_RE.sub(' ', query).strip()} params={params!r}"
+            )
+
+    def snapshot(self, top: Optional[int] = None) -> Dict:
+        """Statistics sorted by total time spent, optionally limited to the `top` entries."""
+        with self._lock:
+            templates = [{"template": t, **timing.summary()} for t, timing in self._by_template.items()]
+            callers = [
+                {"caller": caller, "template": t, **timing.summary()}
+                for (caller, t), timing in self._by_caller.items()
+            ]
+        templates.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        callers.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return {
+            "name": self.name,
+            "slow_ms": self.slow_ms,
+            "caller_sample": self.caller_sample,
+            "templates": templates[:top],
+            "callers": callers[:top],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_template.clear()
+            self._by_caller.clear()
@@ -11,6 +11,18 @@ TMP_ROOT = PROJECT_ROOT / "tmp"
 STATIC_ROOT = PROJECT_ROOT / "static"
 TEMPLATES_ROOT = PROJECT_ROOT / "templates"
 
+# Statements slower than <PREFIX>_SLOW_QUERY_MS are appended here (rotated at 10MB).
+SLOW_QUERY_LOG_FILE = Path(os.getenv("SLOW_QUERY_LOG_FILE", str(TMP_ROOT / "logs" / "slow_query.log")))
+# QUERY_SCOPES=1 counts the statements of every API request and task run, and logs SQL
+# templates repeated QUERY_SCOPE_REPEAT_THRESHOLD times or more (likely N+1 patterns).
+QUERY_SCOPES = os.getenv("QUERY_SCOPES", "0") == "1"
+QUERY_SCOPE_REPEAT_THRESHOLD = int(os.getenv("QUERY_SCOPE_REPEAT_THRESHOLD", "10"))
+# QUERY_STATS_API=1 serves GET /api/stats/queries, which exposes SQL templates, callers and
+# timings. It has no authentication, so only enable it where the API is not public.
+QUERY_STATS_API = os.getenv("QUERY_STATS_API", "0") == "1"
+# Persistent name -> hepburn reading cache of utils.romanization.
+READING_CACHE_FILE = Path(os.getenv("READING_CACHE_FILE", str(TMP_ROOT / "cache" / "readings.sqlite3")))
+
 DEFAULT_REQUEST_DELAY = 1.0
 DEFAULT_TIMEOUT = 30
 JAPAN_CITY_BASE_URL = "https://uub.jp/cty/"
@@ -9,6 +9,7 @@ class Task(BaseModel):
     _table_name = "task"
     _columns = ["domain", "task_type", "owner", "last_update", "date"]
     _db_manager = etl_db_manager
+    __slots__ = ("domain", "task_type", "owner", "last_update", "date")
     
     def __init__(self, **kwargs):
         self.id = kwargs.get("id")
@@ -23,17 +24,17 @@ class Task(BaseModel):
         if not task_type or not owner:
             return None
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE task_type = %s and owner = %s"
+        query = f"{cls.select_sql()} WHERE task_type = %s and owner = %s"
         params = (task_type, owner)
         return cls.get_db_results(query, params, fetch_one=True)
 
     @classmethod
     def get_last_updated(cls, domain: Optional[str] = None) -> 'Task':
         if domain:
-            query = f"SELECT * FROM {cls.get_table_name()} WHERE domain = %s ORDER BY last_update LIMIT 1"
+            query = f"{cls.select_sql()} WHERE domain = %s ORDER BY last_update LIMIT 1"
             params = (domain, )
         else:
-            query = f"SELECT * FROM {cls.get_table_name()} ORDER BY last_update LIMIT 1"
+            query = f"{cls.select_sql()} ORDER BY last_update LIMIT 1"
             params = ()
 
         return cls.get_db_results(query, params, fetch_one=True)
@@ -1,7 +1,12 @@
 import logging
 import datetime
+from contextlib import ExitStack
 
+from core.database import db_manager, etl_db_manager
+from core.query_scope import query_scope
+from core.settings import QUERY_SCOPES, QUERY_SCOPE_REPEAT_THRESHOLD
 from etl.models import Task
+from models.identity_map import identity_scope
 
 class TaskRunner:
     TASK_TIMEOUT_SECS = 600
@@ -13,6 +18,13 @@ class TaskRunner:
     NOT_READY_FOR_WORK = -1
     FAILURE = -999
 
+    # Migrators look up rows they wrote moments earlier, so task reads skip the replicas.
+    READ_FROM_PRIMARY = True
+    # Give the run an identity map, so rows it looks up repeatedly are fetched once.
+    IDENTITY_SCOPE = False
+    # Most statements start() may run before QUERY_SCOPES reports the run as over budget.
+    QUERY_BUDGET = None
+
     def __init__(self, task: Task) -> None:
         self._task = task
         self._date = None
@@ -31,7 +43,18 @@ class TaskRunner:
             logging.error(f'FAILURE {logging_arg}')
             return self.event(self.FAILURE)
 
-        status = self.start()
+        with ExitStack() as stack:
+            if self.READ_FROM_PRIMARY:
+                stack.enter_context(db_manager.read_from_primary())
+                stack.enter_context(etl_db_manager.read_from_primary())
+            if self.IDENTITY_SCOPE:
+                stack.enter_context(identity_scope(logging_arg))
+            if QUERY_SCOPES:
+                stack.enter_context(
+                    query_scope(logging_arg, budget=self.QUERY_BUDGET, repeat_threshold=QUERY_SCOPE_REPEAT_THRESHOLD)
+                )
+            status = self.start()
+
         if status == self.SUCCESS:
             self.complete()
             logging.info(f"SUCCESS {logging_arg}")
@@ -2,12 +2,16 @@ import logging
 from re import L
 import sys
 import datetime
+import json
 import threading
 import time
 from typing import final
 
+from core.database import db_manager, etl_db_manager
+from core.settings import TMP_ROOT
 from etl.thread import TaskThread
 from etl.models import Task
+from models.query_cache import query_cache
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -15,6 +19,7 @@ logging.basicConfig(level=logging.DEBUG)
 class TaskScheduler:
     DOMAIN = None
     HEALTH_CHECK_PERIOD_SEC = 30
+    QUERY_STATS_DUMP_PERIOD_SEC = 300
 
     @classmethod
     def health_check(cls):
@@ -53,11 +58,36 @@ class TaskScheduler:
 
             logging.info(f"Disabled task {task_type} for owner {owner}")
 
+    @classmethod
+    def dump_query_stats(cls) -> None:
+        """Write both managers' query statistics and the query cache counters to tmp/logs/query_stats_<domain>.json and log the top templates."""
+        stats = {
+            manager.config_prefix: {"queries": manager.query_stats.snapshot(), "pool": manager.pool_stats()}
+            for manager in (db_manager, etl_db_manager)
+        }
+        path = TMP_ROOT / "logs" / f"query_stats_{cls.get_domain() or cls.__name__}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({**stats, "cache": query_cache.stats()}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        for prefix, manager_stats in stats.items():
+            for entry in manager_stats["queries"]["templates"][:5]:
+                logging.info(
+                    f"Query stats [{prefix}] count={entry['count']} total_ms={entry['total_ms']:.0f} "
+                    f"p95_ms={entry['p95_ms']:.1f} rows={entry['rows']}: {entry['template'][:200]}"
+                )
+        logging.info(f"Query stats written to {path}")
+
     @classmethod
     def start(cls, threads: int) -> None:
         logging.info(f"{cls.__name__} start running")
+        # One connection per task thread, plus one for this thread's health checks; warm_up()
+        # stops at the etl workload budget, which also bounds what the threads can hold.
+        etl_db_manager.warm_up(threads + 1)
+        db_manager.warm_up(threads + 1)
+
         thread_list = []
         exit_flag = threading.Event()
+        next_stats_dump = time.monotonic() + cls.QUERY_STATS_DUMP_PERIOD_SEC
 
         try:
             for _ in range(threads):
@@ -76,6 +106,9 @@ class TaskScheduler:
                     else:
                         thread.keep_alive()
                 cls.health_check()
+                if time.monotonic() >= next_stats_dump:
+                    cls.dump_query_stats()
+                    next_stats_dump = time.monotonic() + cls.QUERY_STATS_DUMP_PERIOD_SEC
                 logging.info(f"Waiting for health check for {cls.HEALTH_CHECK_PERIOD_SEC} seconds")
                 time.sleep(cls.HEALTH_CHECK_PERIOD_SEC)
         except:
@@ -85,4 +118,8 @@ class TaskScheduler:
             for thread in thread_list:
                 thread.join()
                 thread.cleanup()
+            try:
+                cls.dump_query_stats()
+            except Exception:
+                logging.exception("Failed to dump query stats")
             logging.critical("All threads exited")
@@ -51,7 +51,10 @@ class TaskThread(threading.Thread):
             self._task = None
 
     def _select_task(self):
-        task = Task.get_last_updated(domain=self._domain)
+        # A lagging replica returns stale last_update values: tasks that were just claimed or
+        # finished look due again.
+        with Task.get_db_manager().read_from_primary():
+            task = Task.get_last_updated(domain=self._domain)
         if task:
             timestamp = datetime.datetime.now()
             if task.last_update < timestamp:
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
 from api.models import PrefectureOut, CityOut
 from core.settings import FUKE_IMAGE_URL_PREFIX
@@ -12,22 +12,27 @@ router = APIRouter(prefix="/api/fuke", tags=["fuke"])
 
 
 @router.get("/search", response_model=FukeSearchResponse)
-def search_fuke(
+async def search_fuke(
     pref_id: Optional[int] = Query(None, gt=0),
     city_id: Optional[int] = Query(None, gt=0),
     jpost_name: Optional[str] = Query(None),
     abolition: Optional[bool] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes precedence over page."),
 ) -> FukeSearchResponse:
-    fuke_details, total = Fuke.get_fuke_details_with_total(
-        pref_id=pref_id,
-        city_id=city_id,
-        jpost_name=jpost_name,
-        abolition=abolition,
-        page=page,
-        page_size=page_size,
-    )
+    try:
+        fuke_details, total, next_cursor = await Fuke.aget_fuke_details_with_total(
+            pref_id=pref_id,
+            city_id=city_id,
+            jpost_name=jpost_name,
+            abolition=abolition,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if total == 0 or not fuke_details:
         return FukeSearchResponse(total=0, page=page, page_size=page_size, items=[])
@@ -71,5 +76,5 @@ def search_fuke(
             )
         )
 
-    return FukeSearchResponse(total=total, page=page, page_size=page_size, items=items)
+    return FukeSearchResponse(total=total, page=page, page_size=page_size, items=items, next_cursor=next_cursor)
 
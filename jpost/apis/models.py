@@ -24,4 +24,6 @@ class FukeSearchResponse(BaseModel):
     page: int
     page_size: int
     items: List[FukeItemOut]
+    # Pass back as `cursor` to fetch the following page; None on the last page.
+    next_cursor: Optional[str] = None
 
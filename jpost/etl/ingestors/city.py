@@ -13,7 +13,7 @@ from core.settings import (
     DEFAULT_REQUEST_DELAY,
 )
 from etl.runner import TaskRunner
-from models.administration import Prefecture
+from models.administration import reference_data
 
 
 logging.basicConfig(level=logging.INFO)
@@ -23,11 +23,6 @@ class CityIngestor(TaskRunner):
     TASK_TIMEOUT_SECS = 24*60*60
     INTERVAL_DAYS = 7
 
-    @classmethod
-    def _load_prefectures(cls) -> dict[str, Prefecture]:
-        prefectures = Prefecture.get_all()
-        return {p.en_name: p for p in prefectures}
-
     @classmethod
     def _fetch_html(cls, url: str, timeout: int = DEFAULT_TIMEOUT) -> str:
         resp = requests.get(url, headers={}, timeout=timeout)
@@ -137,10 +132,10 @@ class CityIngestor(TaskRunner):
         return records
 
     def start(self):
-        prefectures_by_en = self._load_prefectures()
         all_data: dict[str, list[dict]] = {}
 
-        for en_name, pref in prefectures_by_en.items():
+        for pref in reference_data.prefectures():
+            en_name = pref.en_name
             slug = en_name.lower()
             url = f"{JAPAN_CITY_BASE_URL}{slug}.html"
             logging.info(f"Fetching city information for {pref.full_name} from {url}")
@@ -16,7 +16,7 @@ from core.settings import (
     REQUEST_DELAY_BEFORE_DOWNLOAD
 )
 from etl.runner import TaskRunner
-from models.administration import Prefecture
+from models.administration import reference_data
 from jpost.enums.text import JPTextEnum
 from jpost.models.ingestor import FukeIngestorRecords
 
@@ -26,16 +26,6 @@ logging.basicConfig(level=logging.DEBUG)
 
 class FukeIngestorMixin(object):
 
-    @classmethod
-    def _load_prefectures(cls):
-        prefecture_dict = {}
-
-        prefectures = Prefecture.get_all()
-        for prefecture in prefectures:
-            prefecture_dict.update(prefecture.to_en_dict())
-        
-        return prefecture_dict
-
     @classmethod
     def _fetch_html(cls, url: str, timeout: int=JPOST_REQUEST_TIMEOUT) -> str:
         resp = requests.get(url, headers=FUKE_HEADERS, timeout=timeout)
@@ -166,9 +156,12 @@ class FukeBasicIngestor(FukeIngestorMixin, TaskRunner):
 
     def _crawl_prefecture(self) -> int:
         key = self._task.owner
-        prefecture = self._load_prefectures()[key]
-        url = prefecture.get("jpost_url")
-        pref_id = prefecture.get("pref_id")
+        prefecture = reference_data.by_en_name(key)
+        if not prefecture:
+            logging.error(f"Prefecture not found for key={key}")
+            return self.FAILURE
+        url = prefecture.jpost_url
+        pref_id = prefecture.pref_id
         if not url:
             logging.info(f"Skip prefecture {key}: no url")
             return self.FAILURE
@@ -1,10 +1,10 @@
 import logging
 import json
-import pykakasi
 
 from core.settings import PROJECT_ROOT
 from etl.runner import TaskRunner
-from models.administration import Prefecture, City
+from models.administration import City, reference_data
+from utils.romanization import romanizer
 
 logging.basicConfig(level=logging.INFO)
 
@@ -12,18 +12,6 @@ logging.basicConfig(level=logging.INFO)
 class CityMigrator(TaskRunner):
     INTERVAL_DAYS = 7
 
-    @classmethod
-    def _load_prefectures(cls) -> dict[str, Prefecture]:
-        prefectures = Prefecture.get_all()
-        return {p.en_name: p for p in prefectures}
-
-    @classmethod
-    def _parse_reading(cls, name: str) -> str:
-        kks = pykakasi.kakasi()
-        result = kks.convert(name)
-        roman = ''.join([item['hepburn'] for item in result]).capitalize()
-        return roman
-
     def start(self):
         dist_dir = PROJECT_ROOT / "dist"
         city_path = dist_dir / "city.json"
@@ -34,22 +22,25 @@ class CityMigrator(TaskRunner):
             logging.error(f"Data file {city_path} can not be found.")
             return self.FAILURE
 
-        prefectures = self._load_prefectures()
+        # Resolved up front: every bulk_insert() below invalidates reference_data, which then
+        # reloads once, on its next use after the loop, instead of once per prefecture.
+        prefectures = {p: reference_data.by_en_name(p) for p in records}
+
         for p, city_list in records.items():
-            prefecture = prefectures.get(p)
+            prefecture = prefectures[p]
             if not prefecture:
                 continue
             pref_id = prefecture.pref_id
 
-            new_cities = []
-            for city_dict in city_list:
-                name = city_dict.get("name")
-                city = City.get_by_name_and_pref(name, pref_id)
-                if city:
-                    continue
+            existing = City.get_many_by(["name", "pref_id"], [(c.get("name"), pref_id) for c in city_list])
+
+            new_city_dicts = [c for c in city_list if (c.get("name"), pref_id) not in existing]
+            readings = romanizer.readings(c.get("name") for c in new_city_dicts)
 
+            new_cities = []
+            for city_dict in new_city_dicts:
                 city_dict["pref_id"] = pref_id
-                city_dict["reading"] = self._parse_reading(name)
+                city_dict["reading"] = readings.get(city_dict.get("name"), "")
                 new_cities.append(City(**city_dict))
 
             if new_cities:
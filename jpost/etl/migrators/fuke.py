@@ -5,8 +5,9 @@ from pathlib import Path
 
 from core.settings import TMP_ROOT
 from etl.runner import TaskRunner
-from models.administration import Prefecture, City, Facility
+from models.administration import Facility, reference_data
 from jpost.models.jpost import Fuke
+from utils.city_matcher import CityMatcher, load_city_matchers
 
 
 logging.basicConfig(level=logging.INFO)
@@ -16,25 +17,8 @@ class FukeMigrator(TaskRunner):
     INTERVAL_DAYS = 1
     DESCRIPTION_MAX_LENTH = 250
     AUTHOR_MAX_LENTH = 28
-
-    @classmethod
-    def _load_prefectures(cls) -> dict[str, Prefecture]:
-        prefectures = Prefecture.get_all()
-        return {p.en_name: p for p in prefectures}
-
-    @classmethod
-    def _load_cities_by_pref(cls) -> dict[int, list[tuple[str, int]]]:
-        cities = City.get_all()
-        cities_by_pref: dict[int, list[tuple[str, int]]] = {}
-        for c in cities:
-            if not c.pref_id or not c.name:
-                continue
-            cities_by_pref.setdefault(c.pref_id, []).append((c.name, c.id))
-
-        for pref_id, city_list in cities_by_pref.items():
-            city_list.sort(key=lambda item: len(item[0]), reverse=True)
-
-        return cities_by_pref
+    # Rows per multi-row upsert; each chunk is committed on its own.
+    CHUNK_SIZE = 500
 
     @staticmethod
     def _parse_address_from_location(location: str) -> str:
@@ -47,17 +31,14 @@ class FukeMigrator(TaskRunner):
 
     @staticmethod
     def _detect_city_id_from_location(
-        location: str, pref_id: int, cities_by_pref: dict[int, list[tuple[str, int]]]
+        location: str, pref_id: int, city_matchers: dict[int, CityMatcher]
     ) -> int | None:
         if not location or not pref_id:
             return None
 
         second_line = location.split("\n")[1]
-        candidates = cities_by_pref.get(pref_id) or []
-        for name, city_id in candidates:
-            if name and name in second_line:
-                return city_id
-        return None
+        matcher = city_matchers.get(pref_id)
+        return matcher.find(second_line) if matcher else None
 
     @staticmethod
     def _parse_geo_from_address(address_obj) -> tuple[Decimal | None, Decimal | None, str | None]:
@@ -85,11 +66,11 @@ class FukeMigrator(TaskRunner):
 
         return lat_val, long_val, postcode
 
-    def _upsert_jpost_office(
+    def _build_jpost_office(
         self,
         record: dict,
         pref_id: int,
-        cities_by_pref: dict[int, list[tuple[str, int]]],
+        city_matchers: dict[int, CityMatcher],
     ) -> Facility | None:
         jpost_name = (record.get("post_office_name") or "").strip()
         if not jpost_name:
@@ -100,14 +81,9 @@ class FukeMigrator(TaskRunner):
 
         address = self._parse_address_from_location(location)
         latitude, longtitude, postcode = self._parse_geo_from_address(address_obj)
-        city_id = self._detect_city_id_from_location(location, pref_id, cities_by_pref)
-
-        existing = Facility.get_by_name_and_pref(jpost_name, pref_id)
-        if existing:
-            jpost = existing
-        else:
-            jpost = Facility(name=jpost_name, pref_id=pref_id)
+        city_id = self._detect_city_id_from_location(location, pref_id, city_matchers)
 
+        jpost = Facility(name=jpost_name, pref_id=pref_id)
         jpost.type = Facility.FacilityType.JPOST.value
         jpost.address = address
         jpost.postcode = postcode
@@ -116,14 +92,9 @@ class FukeMigrator(TaskRunner):
         jpost.business_hours = None
         jpost.pref_id = pref_id
         jpost.city_id = city_id
-
-        success = jpost.save()
-        if not success:
-            logging.error(f"Failed to save JPostOffice for {jpost_name}")
-            return None
         return jpost
 
-    def _upsert_fuke(self, record: dict, jpost_id: int) -> Fuke | None:
+    def _build_fuke(self, record: dict, jpost_id: int) -> Fuke | None:
         if not jpost_id:
             return None
 
@@ -141,33 +112,49 @@ class FukeMigrator(TaskRunner):
         if len(author) > self.AUTHOR_MAX_LENTH:
             author = author[:self.AUTHOR_MAX_LENTH] + "..."
 
-        existing = Fuke.get_by_name_and_jpost(fuke_name, jpost_id, abolition=abolition)
-        if existing:
-            fuke = existing
-        else:
-            fuke = Fuke(name=fuke_name, jpost_id=jpost_id)
-
+        fuke = Fuke(name=fuke_name, jpost_id=jpost_id)
         fuke.abolition = abolition
         fuke.image_url = image_url
         fuke.start_date = start_date
         fuke.description = description
         fuke.author = author
         fuke.jpost_id = jpost_id
-
-        success = fuke.save()
-        if not success:
-            logging.error(f"Failed to save Fuke for {fuke_name} (jpost_id={jpost_id})")
-            return None
         return fuke
 
+    def _upsert(self, model, objs: list, key: str) -> dict:
+        """
+        bulk_upsert `objs` CHUNK_SIZE at a time. A chunk that fails is retried row by row,
+        so one bad record costs only itself; the records that still fail are logged and
+        left without an id.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        for start in range(0, len(objs), self.CHUNK_SIZE):
+            chunk = objs[start:start + self.CHUNK_SIZE]
+            try:
+                results = [model.bulk_upsert(chunk, chunk_size=self.CHUNK_SIZE)]
+            except Exception as e:
+                logging.warning(f"Prefecture {key}: {model.__name__} chunk of {len(chunk)} failed, retrying row by row: {e}")
+                results = []
+                for obj in chunk:
+                    try:
+                        results.append(model.bulk_upsert([obj]))
+                    except Exception as e:
+                        obj.id = None
+                        counts["failed"] += 1
+                        record = {col: getattr(obj, col, None) for col in model._natural_key}
+                        logging.error(f"Prefecture {key}: failed to upsert {model.__name__} {record}: {e}")
+            for result in results:
+                for name, count in result.items():
+                    counts[name] += count
+        return counts
+
     def start(self):
         fuke_root = TMP_ROOT / "fuke"
         if not fuke_root.exists():
             logging.error(f"TMP_ROOT/fuke directory not found: {fuke_root}")
             return self.FAILURE
 
-        prefectures = self._load_prefectures()
-        cities_by_pref = self._load_cities_by_pref()
+        city_matchers = load_city_matchers()
 
         changed = False
 
@@ -180,7 +167,7 @@ class FukeMigrator(TaskRunner):
                 continue
 
             key = pref_dir.name
-            prefecture = prefectures.get(key)
+            prefecture = reference_data.by_en_name(key)
             if not prefecture:
                 logging.warning(f"Skip directory {key}: prefecture not found in DB")
                 continue
@@ -196,14 +183,22 @@ class FukeMigrator(TaskRunner):
 
             logging.info(f"Migrating Fuke data for prefecture {key} from {data_file}")
 
+            built = []
             for r in records:
-                jpost = self._upsert_jpost_office(r, pref_id, cities_by_pref)
-                if not jpost or not jpost.id:
-                    continue
+                jpost = self._build_jpost_office(r, pref_id, city_matchers)
+                if jpost:
+                    built.append((jpost, r))
+            if not built:
+                continue
+
+            jpost_counts = self._upsert(Facility, [jpost for jpost, _ in built], key)
+            fukes = [
+                fuke for fuke in (self._build_fuke(r, jpost.id) for jpost, r in built if jpost.id) if fuke
+            ]
+            fuke_counts = self._upsert(Fuke, fukes, key)
 
-                fuke = self._upsert_fuke(r, jpost.id)
-                if jpost or fuke:
-                    changed = True
+            changed = True
+            logging.info(f"Prefecture {key}: JPostOffice {jpost_counts}, Fuke {fuke_counts}")
 
         if changed:
             return self.SUCCESS
@@ -1,5 +1,5 @@
 from etl.scheduler import TaskScheduler
-from models.administration import Prefecture
+from models.administration import reference_data
 from jpost.etl.datatype import TaskType
 from jpost.etl.ingestors.city import CityIngestor
 from jpost.etl.ingestors.fuke import FukeBasicIngestor, FukeDetailIngestor
@@ -31,8 +31,7 @@ class JPostTaskScheduler(TaskScheduler):
 
     @classmethod
     def health_check(cls):
-        prefectures = Prefecture.get_all()
-        for prefecture in prefectures:
+        for prefecture in reference_data.prefectures():
             for task_type in cls.TASK_OWNER_RUNNERS:
                 cls.enable_task(task_type, prefecture.en_name)
 
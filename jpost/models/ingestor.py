@@ -1,7 +1,6 @@
 import logging
 import datetime
 from enum import Enum
-from mysql.connector.errors import IntegrityError
 
 from core.database import db_manager
 from models.base import BaseModel
@@ -11,6 +10,7 @@ class FukeIngestorRecords(BaseModel):
     _table_name = "fuke_ingestor_record"
     _columns = ["owner", "state", "date", "created_time", "last_updated"]
     _db_manager = db_manager
+    __slots__ = ("owner", "state", "date", "created_time", "last_updated")
 
 
     class StateEnum(Enum):
@@ -35,7 +35,7 @@ class FukeIngestorRecords(BaseModel):
         if not owner:
             return None
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE owner = %s"
+        query = f"{cls.select_sql()} WHERE owner = %s"
         params = (owner, )
 
         return cls.get_db_results(query, params, fetch_one=True)
@@ -45,7 +45,7 @@ class FukeIngestorRecords(BaseModel):
         if not owner or not date:
             return None
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE owner = %s and date = %s"
+        query = f"{cls.select_sql()} WHERE owner = %s and date = %s"
         params = (owner, date)
 
         return cls.get_db_results(query, params, fetch_one=True)
@@ -1,13 +1,18 @@
 from typing import Optional, List
 from xxlimited import Str
 from core.database import db_manager
-from models.base import BaseModel
+from models.base import BaseModel, Keyset
 
 
 class Fuke(BaseModel):
     _table_name = "fuke"
     _columns = ["name", "abolition", "image_url", "start_date", "description", "author", "jpost_id"]
     _db_manager = db_manager
+    _natural_key = ["name", "jpost_id", "abolition"]
+    __slots__ = ("name", "abolition", "image_url", "start_date", "description", "author", "jpost_id")
+
+    # Search result order: current before abolished, then by city with unknown cities last.
+    DETAILS_KEYSET = Keyset("f.abolition", "c.id IS NULL", "c.id", "f.id")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id")
@@ -26,13 +31,8 @@ class Fuke(BaseModel):
             return None
 
         if abolition is not None:
-            query = f"SELECT * FROM {cls.get_table_name()} WHERE name = %s and jpost_id = %s and abolition = %s"
-            params = (name, jpost_id, abolition)
-        else:
-            query = f"SELECT * FROM {cls.get_table_name()} WHERE name = %s and jpost_id = %s"
-            params = (name, jpost_id)
-
-        return cls.get_db_results(query, params, fetch_one=True)
+            return cls.get_one_by(["name", "jpost_id", "abolition"], (name, jpost_id, abolition))
+        return cls.get_one_by(["name", "jpost_id"], (name, jpost_id))
 
     @classmethod
     def _build_where_clause(
@@ -73,15 +73,22 @@ class Fuke(BaseModel):
         abolition: Optional[bool] = None,
         page: int = 1,
         page_size: int = 12,
-    ) -> List[dict]:
-        offset = (page - 1) * page_size
-
+        cursor: Optional[str] = None,
+    ) -> tuple[List[dict], Optional[str]]:
+        """
+        One page of search results: the rows after `cursor` (see details_cursor()) when
+        given, otherwise page number `page`. Also returns the cursor of the next page,
+        None on the last one.
+        """
         where_clause, params = cls._build_where_clause(
             pref_id=pref_id,
             city_id=city_id,
             jpost_name=jpost_name,
             abolition=abolition,
         )
+        seek_sql, seek_params, limit_sql, limit_params = cls.DETAILS_KEYSET.page_clauses(
+            cursor, page, page_size, lookahead=1
+        )
 
         base_join = """
             FROM fuke f
@@ -105,11 +112,13 @@ class Fuke(BaseModel):
                 o.postcode AS jpost_office_postcode,
                 COALESCE(c.name, '') AS city_name,
                 p.full_name AS prefecture_name,
-                p.en_name AS prefecture_en
+                p.en_name AS prefecture_en,
+                c.id AS city_id
             {base_join}
             {where_clause}
-            ORDER BY f.abolition, c.id IS NULL, c.id, f.id
-            LIMIT %s OFFSET %s
+            {seek_sql}
+            ORDER BY {cls.DETAILS_KEYSET.order_by}
+            {limit_sql}
         """
 
         columns = [
@@ -126,12 +135,19 @@ class Fuke(BaseModel):
             "city_name",
             "prefecture_name",
             "prefecture_en",
+            "city_id",
         ]
         data_params = list(params)
-        data_params.extend([page_size, offset])
+        data_params.extend(seek_params)
+        data_params.extend(limit_params)
 
         rows = cls.get_db_manager().execute_query(data_sql, tuple(data_params), fetch_all=True)
-        return [dict(zip(columns, row)) for row in rows] if rows else []
+        items = [dict(zip(columns, row)) for row in rows] if rows else []
+        # One row past the page tells whether another page follows.
+        if len(items) <= page_size:
+            return items, None
+        items = items[:page_size]
+        return items, cls.details_cursor(items[-1])
 
     @classmethod
     def get_fuke_details_with_total(
@@ -142,7 +158,8 @@ class Fuke(BaseModel):
         abolition: Optional[bool] = None,
         page: int = 1,
         page_size: int = 12,
-    ) -> tuple[List[dict], int]:
+        cursor: Optional[str] = None,
+    ) -> tuple[List[dict], int, Optional[str]]:
         where_clause, params = cls._build_where_clause(
             pref_id=pref_id,
             city_id=city_id,
@@ -163,14 +180,26 @@ class Fuke(BaseModel):
         total = int(count_row[0]) if count_row else 0
 
         if total == 0:
-            return [], 0
+            return [], 0, None
 
-        items = cls.get_fuke_details(
+        items, next_cursor = cls.get_fuke_details(
             pref_id=pref_id,
             city_id=city_id,
             jpost_name=jpost_name,
             abolition=abolition,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
-        return items, total
\ No newline at end of file
+        return items, total, next_cursor
+
+    @classmethod
+    async def aget_fuke_details_with_total(cls, **kwargs) -> tuple[List[dict], int, Optional[str]]:
+        return await cls.get_db_manager().run_async(cls.get_fuke_details_with_total, **kwargs)
+
+    @classmethod
+    def details_cursor(cls, item: dict) -> str:
+        """Cursor of the search results that follow `item`, a row of get_fuke_details()."""
+        return cls.DETAILS_KEYSET.cursor(
+            [item["abolition"], item["city_id"] is None, item["city_id"], item["id"]]
+        )
\ No newline at end of file
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
@@ -14,14 +16,39 @@ from core.settings import (
     FUKE_IMAGE_ENABLE_LOCAL,
     MANHOLE_CARD_IMAGE_ROOT,
     MANHOLE_CARD_IMAGE_URL_PREFIX,
-    MANHOLE_CARD_IMAGE_ENABLE_LOCAL
+    MANHOLE_CARD_IMAGE_ENABLE_LOCAL,
+    QUERY_SCOPES,
+    QUERY_SCOPE_REPEAT_THRESHOLD,
 )
+from core.database import db_manager, set_default_workload
+from core.query_scope import query_scope
 from api.base import router as base_router
 from jpost.apis.fuke import router as fuke_router
 from manhole_card.apis.manhole_card import router as manhole_card_router
 
 
-app = FastAPI(title=f"{APP_NAME_EN}")
+# Request handlers get the "api" budget and are served first when the pool is contended.
+set_default_workload("api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the minimum pool before accepting requests so the first burst does not
+    # queue behind connection handshakes.
+    db_manager.warm_up()
+    yield
+    db_manager.shutdown_executor()
+    db_manager.close_all_connections()
+
+
+app = FastAPI(title=f"{APP_NAME_EN}", lifespan=lifespan)
+
+
+if QUERY_SCOPES:
+    @app.middleware("http")
+    async def count_request_queries(request: Request, call_next):
+        with query_scope(f"{request.method} {request.url.path}", repeat_threshold=QUERY_SCOPE_REPEAT_THRESHOLD):
+            return await call_next(request)
 
 static_dir = STATIC_ROOT
 templates_dir = TEMPLATES_ROOT
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
 from core.settings import MANHOLE_CARD_IMAGE_URL_PREFIX
 from models.administration import Prefecture
@@ -11,18 +11,23 @@ router = APIRouter(prefix="/api/manhole-card", tags=["manhole_card"])
 
 
 @router.get("/search", response_model=ManholeCardSearchResponse)
-def search_manhole_card(
+async def search_manhole_card(
     pref_id: Optional[int] = Query(None, gt=0),
     name: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes precedence over page."),
 ) -> ManholeCardSearchResponse:
 
-    manhole_cards, total = ManholeCard.get_by_pref_id_with_total(
-        pref_id=pref_id,
-        page=page,
-        page_size=page_size,
-    )
+    try:
+        manhole_cards, total, next_cursor = await ManholeCard.aget_by_pref_id_with_total(
+            pref_id=pref_id,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if total == 0 or not manhole_cards:
         return ManholeCardSearchResponse(total=0, page=page, page_size=page_size, items=[])
 
@@ -59,5 +64,5 @@ def search_manhole_card(
             )
         )
 
-    return ManholeCardSearchResponse(total=total, page=page, page_size=page_size, items=items)
+    return ManholeCardSearchResponse(total=total, page=page, page_size=page_size, items=items, next_cursor=next_cursor)
 
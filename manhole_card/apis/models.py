@@ -19,4 +19,6 @@ class ManholeCardSearchResponse(BaseModel):
     total: int
     page: int
     page_size: int
-    items: List[ManholeCardItemOut]
\ No newline at end of file
+    items: List[ManholeCardItemOut]
+    # Pass back as `cursor` to fetch the following page; None on the last page.
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -16,7 +16,7 @@ from core.settings import (
     REQUEST_DELAY_BEFORE_DOWNLOAD,
 )
 from etl.runner import TaskRunner
-from models.administration import Prefecture
+from models.administration import reference_data
 
 
 logging.basicConfig(level=logging.INFO)
@@ -25,14 +25,6 @@ logging.basicConfig(level=logging.INFO)
 class ManholeCardIngestor(TaskRunner):
     INTERVAL_DAYS = 7
 
-    @classmethod
-    def _load_prefectures(cls) -> dict:
-        prefecture_dict: dict = {}
-        prefectures = Prefecture.get_all()
-        for prefecture in prefectures:
-            prefecture_dict.update(prefecture.to_en_dict())
-        return prefecture_dict
-
     @staticmethod
     def _fetch_html(url: str, timeout: int = DEFAULT_TIMEOUT) -> str:
         resp = requests.get(url, timeout=timeout)
@@ -124,12 +116,12 @@ class ManholeCardIngestor(TaskRunner):
 
     def _crawl_prefecture(self) -> int:
         key = self._task.owner
-        prefecture = self._load_prefectures().get(key)
+        prefecture = reference_data.by_en_name(key)
         if not prefecture:
             logging.error(f"Prefecture not found for key={key}")
             return self.FAILURE
 
-        pref_id = prefecture.get("pref_id")
+        pref_id = prefecture.pref_id
         if not pref_id:
             logging.error(f"Prefecture {key} has no pref_id")
             return self.FAILURE
@@ -1,12 +1,15 @@
 import json
 import logging
+from collections import Counter
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+from core.database import db_manager
 from core.settings import TMP_ROOT
 from etl.runner import TaskRunner
-from models.administration import Prefecture, City, Facility
+from models.administration import Facility, reference_data
 from manhole_card.model import ManholeCard, ManholeCardFacility
+from utils.city_matcher import CityMatcher, load_city_matchers
 
 
 logging.basicConfig(level=logging.INFO)
@@ -14,25 +17,12 @@ logging.basicConfig(level=logging.INFO)
 
 class ManholeCardMigrator(TaskRunner):
     INTERVAL_DAYS = 7
-
-    @classmethod
-    def _load_prefectures(cls) -> Dict[str, Prefecture]:
-        prefectures = Prefecture.get_all()
-        return {p.en_name: p for p in prefectures}
-
-    @classmethod
-    def _load_cities_by_pref(cls) -> Dict[int, List[Tuple[str, int]]]:
-        cities = City.get_all()
-        cities_by_pref: Dict[int, List[Tuple[str, int]]] = {}
-        for c in cities:
-            if not c.pref_id or not c.name:
-                continue
-            cities_by_pref.setdefault(c.pref_id, []).append((c.name, c.id))
-
-        for _pref_id, city_list in cities_by_pref.items():
-            city_list.sort(key=lambda item: len(item[0]), reverse=True)
-
-        return cities_by_pref
+    # Updates of one prefecture's existing rows share a transaction, committed every COMMIT_EVERY writes.
+    COMMIT_EVERY = 500
+    # Rows per multi-row INSERT of new cards, facilities and links; each chunk is committed on its own.
+    CHUNK_SIZE = 500
+    # Cards of one municipality share facilities, which are looked up once per run.
+    IDENTITY_SCOPE = True
 
     @staticmethod
     def _looks_like_address(line: str) -> bool:
@@ -278,16 +268,13 @@ class ManholeCardMigrator(TaskRunner):
     def _detect_city_id_from_address(
         address: str,
         pref_id: int,
-        cities_by_pref: Dict[int, List[Tuple[str, int]]],
+        city_matchers: Dict[int, CityMatcher],
     ) -> Optional[int]:
         if not address or not pref_id:
             return None
 
-        candidates = cities_by_pref.get(pref_id) or []
-        for name, city_id in candidates:
-            if name and name in address:
-                return city_id
-        return None
+        matcher = city_matchers.get(pref_id)
+        return matcher.find(address) if matcher else None
 
     def _upsert_facility(
         self,
@@ -295,15 +282,21 @@ class ManholeCardMigrator(TaskRunner):
         address: str,
         pref_id: int,
         city_id: Optional[int],
+        facilities: Dict[Tuple[str, int], Facility],
+        new_facilities: List[Facility],
     ) -> Optional[Facility]:
+        """
+        Update the existing facility in place, or stage a new one in `new_facilities` for a
+        single bulk insert; staged facilities get their id once it has run.
+        """
         if not facility_name or not pref_id:
             return None
 
-        existing = Facility.get_by_name_and_pref(facility_name, pref_id)
-        if existing:
-            facility = existing
-        else:
+        facility = facilities.get((facility_name, pref_id))
+        if not facility:
             facility = Facility(name=facility_name, pref_id=pref_id)
+            facilities[(facility_name, pref_id)] = facility
+            new_facilities.append(facility)
 
         facility.type = Facility.FacilityType.MANHOLE_CARD.value
         facility.address = address
@@ -314,13 +307,25 @@ class ManholeCardMigrator(TaskRunner):
         facility.pref_id = pref_id
         facility.city_id = city_id
 
+        if not facility.id:
+            return facility
+
+        modified = facility.has_changes()
         success = facility.save()
         if not success:
             logging.error(f"Failed to save Facility for {facility_name}")
             return None
+        self._writes["facility_modified" if modified else "facility_unchanged"] += 1
         return facility
 
-    def _upsert_manhole_card(self, pref_id: int, record: dict) -> Optional[ManholeCard]:
+    @staticmethod
+    def _card_key(record: dict) -> Tuple[str, str]:
+        return (record.get("city") or "").strip(), (record.get("series") or "").strip()
+
+    def _upsert_manhole_card(
+        self, pref_id: int, record: dict, cards: Dict[Tuple[str, str], ManholeCard], new_cards: List[ManholeCard]
+    ) -> Optional[ManholeCard]:
+        """Update the existing card in place, or stage a new one in `new_cards` like _upsert_facility()."""
         name = (record.get("city") or "").strip()
         series = (record.get("series") or "").strip()
         release_date = (record.get("release_date") or "").strip()
@@ -331,11 +336,11 @@ class ManholeCardMigrator(TaskRunner):
         if not name or not series:
             return None
 
-        existing = ManholeCard.get_by_name_and_series(name, series)
-        if existing:
-            card = existing
-        else:
+        card = cards.get((name, series))
+        if not card:
             card = ManholeCard(name=name, series=series)
+            cards[(name, series)] = card
+            new_cards.append(card)
 
         card.release_date = release_date
         card.location_info = location_info
@@ -343,25 +348,57 @@ class ManholeCardMigrator(TaskRunner):
         card.image_url = image_url
         card.pref_id = pref_id
 
+        if not card.id:
+            return card
+
+        modified = card.has_changes()
         success = card.save()
         if not success:
             logging.error(f"Failed to save ManholeCard for {name} ({series}, {release_date})")
             return None
+        self._writes["card_modified" if modified else "card_unchanged"] += 1
         return card
 
-    @staticmethod
-    def _link_card_facility(card_id: int, facility_id: int) -> None:
-        if not card_id or not facility_id:
-            return
-
-        existing = ManholeCardFacility.get_by_fuzzy_id(card_id, facility_id)
-        if existing:
+    def _insert(self, model, objs: list, key: str) -> int:
+        """
+        bulk_insert `objs` CHUNK_SIZE at a time. A chunk that fails is retried row by row,
+        so one bad row costs only itself; rows that still fail are logged and keep no id.
+        """
+        inserted = 0
+        for start in range(0, len(objs), self.CHUNK_SIZE):
+            chunk = objs[start:start + self.CHUNK_SIZE]
+            try:
+                inserted += model.bulk_insert(chunk, chunk_size=self.CHUNK_SIZE)
+                continue
+            except Exception as e:
+                logging.warning(f"Prefecture {key}: {model.__name__} chunk of {len(chunk)} failed, retrying row by row: {e}")
+
+            # Ids set before the chunk was rolled back point at no row.
+            for obj in chunk:
+                obj.id = None
+            for obj in chunk:
+                try:
+                    inserted += model.bulk_insert([obj])
+                except Exception as e:
+                    obj.id = None
+                    record = {col: getattr(obj, col, None) for col in model._natural_key}
+                    logging.error(f"Prefecture {key}: failed to insert {model.__name__} {record}: {e}")
+        return inserted
+
+    def _link_cards_facilities(self, pairs: List[Tuple[ManholeCard, Facility]], key: str) -> None:
+        """Insert the card/facility links in `pairs` that do not exist yet, in batches."""
+        keys = list(dict.fromkeys((card.id, facility.id) for card, facility in pairs if card.id and facility.id))
+        if not keys:
             return
 
-        link = ManholeCardFacility(manhole_card_id=card_id, facility_id=facility_id)
-        success = link.save()
-        if not success:
-            logging.error(f"Failed to link ManholeCard(id={card_id}) with Facility(id={facility_id})")
+        existing = ManholeCardFacility.get_many_by(["manhole_card_id", "facility_id"], keys)
+        links = [
+            ManholeCardFacility(manhole_card_id=card_id, facility_id=facility_id)
+            for card_id, facility_id in keys
+            if (card_id, facility_id) not in existing
+        ]
+        if links:
+            self._writes["link_inserted"] += self._insert(ManholeCardFacility, links, key)
 
     def start(self):
         root = TMP_ROOT / "manhole_card"
@@ -369,11 +406,12 @@ class ManholeCardMigrator(TaskRunner):
             logging.error(f"TMP_ROOT/manhole_card directory not found: {root}")
             return self.FAILURE
 
-        prefectures = self._load_prefectures()
-        cities_by_pref = self._load_cities_by_pref()
+        city_matchers = load_city_matchers()
 
         changed = False
         unparsed_locations: List[dict] = []
+        # Rows inserted, updated, or left alone because nothing changed.
+        self._writes = Counter()
 
         for pref_dir in root.iterdir():
             if not pref_dir.is_dir():
@@ -384,7 +422,7 @@ class ManholeCardMigrator(TaskRunner):
                 continue
 
             key = pref_dir.name
-            prefecture = prefectures.get(key)
+            prefecture = reference_data.by_en_name(key)
             if not prefecture:
                 logging.warning(f"Skip directory {key}: prefecture not found in DB")
                 continue
@@ -400,40 +438,63 @@ class ManholeCardMigrator(TaskRunner):
 
             logging.info(f"Migrating ManholeCard data for prefecture {key} from {data_file}")
 
-            for r in records:
-                # Always insert/update ManholeCard first; facility/linking is best-effort.
-                card = self._upsert_manhole_card(pref_id, r)
-                if card:
-                    changed = True
-
-                location = r.get("location") or ""
-                parsed_list = self._parse_locations(location, prefecture.full_name)
-                if not parsed_list:
-                    unparsed_locations.append(
-                        {
-                            "prefecture_en": key,
-                            "prefecture_ja": prefecture.full_name,
-                            "city": r.get("city"),
-                            "series": r.get("series"),
-                            "release_date": r.get("release_date"),
-                            "location": location,
-                            "reason": "parse_failed",
-                        }
-                    )
-                    continue
-
-                for facility_name, address in parsed_list:
-                    city_id = self._detect_city_id_from_address(address, pref_id, cities_by_pref)
-
-                    facility = self._upsert_facility(facility_name, address, pref_id, city_id)
-                    if not facility or not facility.id:
-                        continue
-
-                    if not card or not card.id:
-                        continue
-
-                    self._link_card_facility(card.id, facility.id)
-                    changed = True
+            # Look up the prefecture's existing cards and facilities in a few batched queries.
+            parsed = [(r, self._parse_locations(r.get("location") or "", prefecture.full_name)) for r in records]
+            cards = ManholeCard.get_many_by(["name", "series"], [self._card_key(r) for r in records])
+            facilities = Facility.get_many_by(
+                ["name", "pref_id"],
+                [(facility_name, pref_id) for _, parsed_list in parsed for facility_name, _ in parsed_list],
+            )
+
+            # Existing rows are updated as they are visited; new cards and facilities are
+            # only staged here and inserted afterwards.
+            new_cards: List[ManholeCard] = []
+            new_facilities: List[Facility] = []
+            pairs: List[Tuple[ManholeCard, Facility]] = []
+            try:
+                with db_manager.transaction(commit_every=self.COMMIT_EVERY):
+                    for r, parsed_list in parsed:
+                        card = self._upsert_manhole_card(pref_id, r, cards, new_cards)
+                        if card and card.id:
+                            changed = True
+
+                        location = r.get("location") or ""
+                        if not parsed_list:
+                            unparsed_locations.append(
+                                {
+                                    "prefecture_en": key,
+                                    "prefecture_ja": prefecture.full_name,
+                                    "city": r.get("city"),
+                                    "series": r.get("series"),
+                                    "release_date": r.get("release_date"),
+                                    "location": location,
+                                    "reason": "parse_failed",
+                                }
+                            )
+                            continue
+
+                        for facility_name, address in parsed_list:
+                            city_id = self._detect_city_id_from_address(address, pref_id, city_matchers)
+
+                            facility = self._upsert_facility(
+                                facility_name, address, pref_id, city_id, facilities, new_facilities
+                            )
+                            if facility and card:
+                                pairs.append((card, facility))
+            except Exception as e:
+                logging.error(f"Failed to migrate ManholeCard data for prefecture {key}: {e}")
+                continue
+
+            # Cards, facilities and links are inserted in separate steps, so a row that fails
+            # costs only itself; links are made only between rows that got an id.
+            inserted_cards = self._insert(ManholeCard, new_cards, key)
+            self._writes["card_inserted"] += inserted_cards
+            self._writes["facility_inserted"] += self._insert(Facility, new_facilities, key)
+            self._link_cards_facilities(pairs, key)
+            if inserted_cards:
+                changed = True
+
+        logging.info(f"ManholeCard migration writes: {dict(self._writes)}")
 
         if unparsed_locations:
             report_path = root / "migration_report.json"
@@ -1,5 +1,5 @@
 from etl.scheduler import TaskScheduler
-from models.administration import Prefecture
+from models.administration import reference_data
 from manhole_card.etl.datatype import TaskType
 from manhole_card.etl.ingestor import ManholeCardIngestor
 from manhole_card.etl.migrator import ManholeCardMigrator
@@ -24,8 +24,7 @@ class ManholeCardTaskScheduler(TaskScheduler):
 
     @classmethod
     def health_check(cls):
-        prefectures = Prefecture.get_all()
-        for prefecture in prefectures:
+        for prefecture in reference_data.prefectures():
             for task_type in cls.TASK_OWNER_RUNNERS:
                 cls.enable_task(task_type, prefecture.en_name)
 
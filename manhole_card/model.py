@@ -2,13 +2,19 @@ from typing import List, Optional
 
 from core.database import db_manager
 from models.administration import Facility
-from models.base import BaseModel
+from models.base import BaseModel, Keyset
 
 
 class ManholeCard(BaseModel):
     _table_name = "manhole_card"
     _columns = ["name", "series", "release_date", "location_info", "distribution_time", "image_url", "pref_id"]
     _db_manager = db_manager
+    _natural_key = ["name", "series"]
+    __slots__ = ("name", "series", "release_date", "location_info", "distribution_time", "image_url", "pref_id")
+
+    ID_KEYSET = Keyset("id")
+    # Same order for the search query, where the table is aliased to m.
+    SEARCH_KEYSET = Keyset("m.id")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id")
@@ -34,29 +40,24 @@ class ManholeCard(BaseModel):
         if not name or not series:
             return None
 
-        query = (
-            f"SELECT * FROM {cls.get_table_name()} "
-            "WHERE name = %s AND series = %s"
-        )
-        params = (name, series)
-
-        return cls.get_db_results(query, params, fetch_one=True)
+        return cls.get_one_by(["name", "series"], (name, series))
 
     @classmethod
-    def get_by_pref_id(cls, pref_id: int, page: int = 1, page_size: int = 12) -> List["ManholeCard"]:
-        offset = (page - 1) * page_size
+    def get_by_pref_id(cls, pref_id: int, page: int = 1, page_size: int = 12, cursor: Optional[str] = None) -> List["ManholeCard"]:
         if not pref_id:
             return []
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE pref_id = %s LIMIT %s OFFSET %s"
-        params = (pref_id, page_size, offset)
+        seek_sql, seek_params, limit_sql, limit_params = cls.ID_KEYSET.page_clauses(cursor, page, page_size)
+        query = f"{cls.select_sql()} WHERE pref_id = %s {seek_sql} ORDER BY id {limit_sql}"
+        params = (pref_id, *seek_params, *limit_params)
         return cls.get_db_results(query, params)
     
     @classmethod
-    def get_by_pref_id_with_total(cls, pref_id: int, page: int = 1, page_size: int = 12) -> tuple[List[dict], int]:
-        offset = (page - 1) * page_size
+    def get_by_pref_id_with_total(
+        cls, pref_id: int, page: int = 1, page_size: int = 12, cursor: Optional[str] = None
+    ) -> tuple[List[dict], int, Optional[str]]:
         if not pref_id:
-            return [], 0
+            return [], 0, None
 
         count_query = f"SELECT COUNT(*) FROM {cls.get_table_name()} WHERE pref_id = %s"
         params = (pref_id, )
@@ -65,8 +66,11 @@ class ManholeCard(BaseModel):
         total = int(count_row[0]) if count_row else 0
 
         if total == 0:
-            return [], 0
+            return [], 0, None
 
+        seek_sql, seek_params, limit_sql, limit_params = cls.SEARCH_KEYSET.page_clauses(
+            cursor, page, page_size, lookahead=1
+        )
         data_sql = f"""
             SELECT
                 m.id,
@@ -80,20 +84,41 @@ class ManholeCard(BaseModel):
             FROM manhole_card m
             JOIN prefecture p ON m.pref_id = p.pref_id
             WHERE p.pref_id = %s
-            ORDER BY id
-            LIMIT %s OFFSET %s
+            {seek_sql}
+            ORDER BY {cls.SEARCH_KEYSET.order_by}
+            {limit_sql}
         """
-        data_params = (pref_id, page_size, offset)
+        data_params = (pref_id, *seek_params, *limit_params)
 
         columns = ["id", "name", "series", "location_info", "distribution_time", "image_url", "prefecture_name", "prefecture_en"]
         rows = cls.get_db_manager().execute_query(data_sql, tuple(data_params), fetch_all=True)
-        return [dict(zip(columns, row)) for row in rows] if rows else [], total
+        items = [dict(zip(columns, row)) for row in rows] if rows else []
+        # One row past the page tells whether another page follows.
+        if len(items) <= page_size:
+            return items, total, None
+        items = items[:page_size]
+        return items, total, cls.search_cursor(items[-1])
+
+    @classmethod
+    def search_cursor(cls, item: dict) -> str:
+        """Cursor of the search results that follow `item`, a row of get_by_pref_id_with_total()."""
+        return cls.SEARCH_KEYSET.cursor([item["id"]])
+
+    @classmethod
+    async def aget_by_pref_id_with_total(
+        cls, pref_id: int, page: int = 1, page_size: int = 12, cursor: Optional[str] = None
+    ) -> tuple[List[dict], int, Optional[str]]:
+        return await cls.get_db_manager().run_async(
+            cls.get_by_pref_id_with_total, pref_id, page=page, page_size=page_size, cursor=cursor
+        )
 
 
 class ManholeCardFacility(BaseModel):
     _table_name = "manhole_card_facility"
     _columns = ["manhole_card_id", "facility_id"]
     _db_manager = db_manager
+    _natural_key = ["manhole_card_id", "facility_id"]
+    __slots__ = ("manhole_card_id", "facility_id")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id")
@@ -116,7 +141,7 @@ class ManholeCardFacility(BaseModel):
             params.append(facility_id)
 
         where_clause = " ".join(conditions)
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE 1=1 {where_clause}"
+        query = f"{cls.select_sql()} WHERE 1=1 {where_clause}"
         return cls.get_db_results(query, tuple(params))
 
     @classmethod
@@ -130,12 +155,5 @@ class ManholeCardFacility(BaseModel):
         if not rows:
             return []
 
-        facility_ids = [row[0] for row in rows]
-        if not facility_ids:
-            return []
-        facility_ids = list(set(facility_ids))
-
-        placeholders = ", ".join(["%s"] * len(facility_ids))
-        facility_query = f"SELECT * FROM {Facility.get_table_name()} WHERE id IN ({placeholders})"
-        facilities = Facility.get_db_results(facility_query, tuple(facility_ids))
-        return facilities
\ No newline at end of file
+        facilities = Facility.get_many_by_ids(row[0] for row in rows)
+        return list(facilities.values())
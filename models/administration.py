@@ -1,14 +1,21 @@
+import logging
+import threading
+import time
+
 from enum import Enum
-from typing import List
+from typing import Dict, Iterator, List, Optional
 
 from core.database import db_manager
-from models.base import BaseModel
+from models.base import BaseModel, Keyset
 
 
 class Prefecture(BaseModel):
     _table_name = "prefecture"
     _columns = ["name", "full_name", "en_name", "jpost_url", "pref_id"]
     _db_manager = db_manager
+    _natural_key = ["pref_id"]
+    _cache_ttl = 3600
+    __slots__ = ("name", "full_name", "en_name", "jpost_url", "pref_id")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id")
@@ -18,6 +25,11 @@ class Prefecture(BaseModel):
         self.jpost_url = kwargs.get("jpost_url")
         self.pref_id = kwargs.get("pref_id")
 
+    @classmethod
+    def _drop_cached(cls) -> None:
+        super()._drop_cached()
+        reference_data.invalidate()
+
     def to_en_dict(self):
         return {
             self.en_name: {
@@ -34,6 +46,9 @@ class City(BaseModel):
     _table_name = "city"
     _columns = ["name", "kind", "reading", "pref_id"]
     _db_manager = db_manager
+    _natural_key = ["name", "pref_id"]
+    _cache_ttl = 600
+    __slots__ = ("name", "kind", "reading", "pref_id")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id")
@@ -48,26 +63,163 @@ class City(BaseModel):
         if not pref_id:
             return []
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE pref_id = %s"
+        query = f"{cls.select_sql()} WHERE pref_id = %s"
         params = (pref_id, )
 
         return cls.get_db_results(query, params)
 
+    @classmethod
+    async def aget_by_pref_id(cls, pref_id: int) -> List["City"]:
+        return await cls.get_db_manager().run_async(cls.get_by_pref_id, pref_id)
+
     @classmethod
     def get_by_name_and_pref(cls, name: str, pref_id: int) -> "City":
         if not name or not pref_id:
             return None
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE name = %s and pref_id = %s"
-        params = (name, pref_id)
+        return cls.get_one_by(["name", "pref_id"], (name, pref_id))
+
+    @classmethod
+    def _drop_cached(cls) -> None:
+        super()._drop_cached()
+        reference_data.invalidate()
+
+
+class ReferenceSnapshot:
+    """One load of the prefecture and city tables; its accessors never query."""
+
+    def __init__(self, prefectures: List[Prefecture], cities_by_pref: Dict[int, List[City]]) -> None:
+        self._prefectures = prefectures
+        self._by_en_name = {p.en_name: p for p in prefectures if p.en_name}
+        self._by_pref_id = {p.pref_id: p for p in prefectures if p.pref_id}
+        self._by_full_name = {p.full_name: p for p in prefectures if p.full_name}
+        self._by_id = {p.id: p for p in prefectures}
+        self._cities_by_pref = cities_by_pref
+
+    def prefectures(self) -> List[Prefecture]:
+        """Every prefecture, ordered by pref_id."""
+        return list(self._prefectures)
+
+    def by_en_name(self, en_name: str) -> Optional[Prefecture]:
+        return self._by_en_name.get(en_name)
+
+    def by_pref_id(self, pref_id: int) -> Optional[Prefecture]:
+        return self._by_pref_id.get(pref_id)
+
+    def by_full_name(self, full_name: str) -> Optional[Prefecture]:
+        return self._by_full_name.get(full_name)
+
+    def by_id(self, id: int) -> Optional[Prefecture]:
+        return self._by_id.get(id)
+
+    def cities(self, pref_id: int) -> List[City]:
+        """Cities of the prefecture, ordered by id."""
+        return list(self._cities_by_pref.get(pref_id, []))
+
+    def cities_by_pref(self) -> Dict[int, List[City]]:
+        return {pref_id: list(cities) for pref_id, cities in self._cities_by_pref.items()}
+
+
+class ReferenceData:
+    """Shared, read-only prefectures and cities, reloaded when a periodic probe sees the tables change."""
+    PROBE_SECS = 30
+    RELOAD_SECS = 3600
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = None
+        self._stale = True
+        self._probed_at = 0.0
+        self._loaded_at = 0.0
+        self._snapshot = ReferenceSnapshot([], {})
+
+    def _due(self) -> bool:
+        return self._stale or time.monotonic() - self._probed_at >= self.PROBE_SECS
 
-        return cls.get_db_results(query, params, fetch_one=True)
+    def ensure_fresh(self) -> ReferenceSnapshot:
+        if self._due():
+            with self._lock:
+                if self._due():
+                    self._refresh()
+        return self._snapshot
+
+    async def aensure_fresh(self) -> ReferenceSnapshot:
+        """ensure_fresh() for the event loop: the probe and reload run on the manager's executor."""
+        if self._due():
+            return await db_manager.run_async(self.ensure_fresh)
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _probe(self) -> tuple:
+        query = (
+            f"SELECT (SELECT COUNT(*) FROM {Prefecture.get_table_name()}), (SELECT MAX(id) FROM {Prefecture.get_table_name()}), "
+            f"(SELECT COUNT(*) FROM {City.get_table_name()}), (SELECT MAX(id) FROM {City.get_table_name()})"
+        )
+        return tuple(db_manager.execute_query(query, (), fetch_one=True, readonly=True))
+
+    def _refresh(self) -> None:
+        forced = self._stale
+        self._stale = False
+        # On the primary, so a reload right after a write never picks up a lagging replica.
+        with db_manager.read_from_primary():
+            version = self._probe()
+            now = time.monotonic()
+            if forced or version != self._version or now - self._loaded_at >= self.RELOAD_SECS:
+                self._load()
+                self._loaded_at = now
+        self._version = version
+        self._probed_at = now
+
+    def _load(self) -> None:
+        # iter_all() skips the query cache and the identity map, and inside the transaction
+        # reads both tables on the thread's own connection.
+        with db_manager.transaction():
+            prefectures = sorted(Prefecture.iter_all(), key=lambda p: p.pref_id or 0)
+            cities = list(City.iter_all())
+        cities_by_pref: Dict[int, List[City]] = {}
+        for city in cities:
+            cities_by_pref.setdefault(city.pref_id, []).append(city)
+        for cities in cities_by_pref.values():
+            cities.sort(key=lambda c: c.id)
+
+        # Swap the whole snapshot so readers never see a half-built one.
+        self._snapshot = ReferenceSnapshot(prefectures, cities_by_pref)
+        logging.info(f"ReferenceData: loaded {len(prefectures)} prefecture(s) and {sum(map(len, cities_by_pref.values()))} city(ies)")
+
+    def prefectures(self) -> List[Prefecture]:
+        """Every prefecture, ordered by pref_id."""
+        return self.ensure_fresh().prefectures()
+
+    def by_en_name(self, en_name: str) -> Optional[Prefecture]:
+        return self.ensure_fresh().by_en_name(en_name)
+
+    def by_pref_id(self, pref_id: int) -> Optional[Prefecture]:
+        return self.ensure_fresh().by_pref_id(pref_id)
+
+    def by_full_name(self, full_name: str) -> Optional[Prefecture]:
+        return self.ensure_fresh().by_full_name(full_name)
+
+    def by_id(self, id: int) -> Optional[Prefecture]:
+        return self.ensure_fresh().by_id(id)
+
+    def cities(self, pref_id: int) -> List[City]:
+        """Cities of the prefecture, ordered by id."""
+        return self.ensure_fresh().cities(pref_id)
+
+    def cities_by_pref(self) -> Dict[int, List[City]]:
+        return self.ensure_fresh().cities_by_pref()
+
+
+reference_data = ReferenceData()
 
 
 class Holiday(BaseModel):
     _table_name = "holiday"
     _columns = []
     _db_manager = db_manager
+    __slots__ = ("name", "date")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id")
@@ -79,6 +231,10 @@ class Facility(BaseModel):
     _table_name = "facility"
     _columns = ["name", "type", "address", "postcode", "latitude", "longtitude", "business_hours", "pref_id", "city_id"]
     _db_manager = db_manager
+    _natural_key = ["name", "pref_id"]
+    __slots__ = ("name", "type", "address", "postcode", "latitude", "longtitude", "business_hours", "pref_id", "city_id")
+    # Every column but the free-text business hours, for bulk reads that never show them.
+    LIGHT_COLUMNS = [col for col in _columns if col != "business_hours"]
 
     class FacilityType(Enum):
         JPOST = "jpost"
@@ -102,21 +258,37 @@ class Facility(BaseModel):
         if not name or not pref_id:
             return None
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE name = %s and pref_id = %s"
-        params = (name, pref_id)
-
-        return cls.get_db_results(query, params, fetch_one=True)
+        return cls.get_one_by(["name", "pref_id"], (name, pref_id))
 
     @classmethod
     def get_without_geo_info(cls) -> List["Facility"]:
         query = (
-            f"SELECT * FROM {cls.get_table_name()} "
+            f"{cls.select_sql()} "
             "WHERE (postcode IS NULL OR postcode = '') "
             "   AND (latitude IS NULL OR latitude = '') "
             "   AND (longtitude IS NULL OR longtitude = '')"
         )
         return cls.get_db_results(query, ())
 
+    @classmethod
+    def iter_without_geo_info(cls, batch_size: int = 500) -> Iterator["Facility"]:
+        """
+        Page through facilities missing geo info in id order. Each page is a short query,
+        so no connection stays checked out while the caller does slow work between rows.
+        """
+        where = (
+            "(postcode IS NULL OR postcode = '') "
+            "AND (latitude IS NULL OR latitude = '') "
+            "AND (longtitude IS NULL OR longtitude = '')"
+        )
+        keyset = Keyset("id")
+        cursor = None
+        while True:
+            facilities, cursor = cls.get_page(where, (), keyset, cursor, page_size=batch_size, columns=cls.LIGHT_COLUMNS)
+            yield from facilities
+            if cursor is None:
+                return
+
     def to_dict(self):
         return {
             "name": self.name,
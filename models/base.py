@@ -1,14 +1,125 @@
+import base64
+import binascii
+import json
 import logging
-from typing import List, Iterable
+import re
+from decimal import Decimal
+from typing import Callable, Dict, List, Iterable, Iterator, Optional, Sequence, Tuple
 
 from core.database import BaseDBManager
+from models.identity_map import current_identity_map
+from models.query_cache import MISSING, query_cache
+
+
+def _comparable(value):
+    """Normalize a value so a Python-side value compares equal to what the database returns for it."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    return value
+
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)?")
+
+
+class Keyset:
+    """Seek pagination over an ORDER BY of SQL expressions, the last of which must be unique."""
+
+    def __init__(self, *order: str) -> None:
+        self.order = []
+        for expression in order:
+            expression = expression.strip()
+            descending = expression.upper().endswith(" DESC")
+            if descending or expression.upper().endswith(" ASC"):
+                expression = expression.rsplit(" ", 1)[0].strip()
+            self.order.append((expression, descending))
+        # Compound expressions such as "c.id IS NULL" are compared as a whole.
+        self._operands = [
+            expression if _IDENTIFIER_RE.fullmatch(expression) else f"({expression})"
+            for expression, _ in self.order
+        ]
+
+    @property
+    def order_by(self) -> str:
+        return ", ".join(f"{expression} DESC" if descending else expression for expression, descending in self.order)
+
+    def cursor(self, values: Sequence) -> str:
+        """Opaque cursor pointing just after the row whose sort values are `values`."""
+        if len(values) != len(self.order):
+            raise ValueError(f"Keyset cursor needs {len(self.order)} values, got {len(values)}")
+        data = [value if value is None or isinstance(value, (bool, int, str)) else str(value) for value in values]
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Invalid pagination cursor: {e}") from e
+        if not isinstance(values, list) or len(values) != len(self.order):
+            raise ValueError("Invalid pagination cursor")
+        if not all(value is None or isinstance(value, (bool, int, float, str)) for value in values):
+            raise ValueError("Invalid pagination cursor")
+        return values
+
+    @staticmethod
+    def _after(expression: str, descending: bool, value) -> Tuple[str, list]:
+        if value is None:
+            # NULL sorts before every value ascending and after every value descending.
+            return ("1=0", []) if descending else (f"{expression} IS NOT NULL", [])
+        if descending:
+            return f"({expression} < %s OR {expression} IS NULL)", [value]
+        return f"{expression} > %s", [value]
+
+    @staticmethod
+    def _equal(expression: str, value) -> Tuple[str, list]:
+        if value is None:
+            return f"{expression} IS NULL", []
+        return f"{expression} = %s", [value]
+
+    def seek(self, cursor: Optional[str]) -> Tuple[str, list]:
+        """`AND (...)` predicate selecting the rows after `cursor`, empty for the first page."""
+        if not cursor:
+            return "", []
+
+        values = self.decode(cursor)
+        terms = []
+        params: list = []
+        for i, ((_, descending), operand, value) in enumerate(zip(self.order, self._operands, values)):
+            parts = []
+            for prev_operand, prev_value in zip(self._operands[:i], values[:i]):
+                sql, sql_params = self._equal(prev_operand, prev_value)
+                parts.append(sql)
+                params.extend(sql_params)
+            sql, sql_params = self._after(operand, descending, value)
+            parts.append(sql)
+            params.extend(sql_params)
+            terms.append(f"({' AND '.join(parts)})")
+        return f"AND ({' OR '.join(terms)})", params
+
+    def page_clauses(self, cursor: Optional[str], page: int, page_size: int, lookahead: int = 0) -> Tuple[str, list, str, list]:
+        """Seek predicate and LIMIT clause with their params: after `cursor` if given, else by OFFSET for `page`."""
+        if cursor:
+            seek_sql, seek_params = self.seek(cursor)
+            return seek_sql, seek_params, "LIMIT %s", [page_size + lookahead]
+        return "", [], "LIMIT %s OFFSET %s", [page_size + lookahead, (page - 1) * page_size]
 
 
 class BaseModel:
+    # Subclasses list their columns in __slots__, so instances carry no per-object __dict__.
+    # `_loaded` is the (id, *columns) row as last read from or written to the database.
+    __slots__ = ("id", "_loaded")
+
     _table_name: str = None
     _columns: List[str] = None
     _db_manager: BaseDBManager = None
-
+    # Columns of the table's unique key other than id, used by bulk_upsert().
+    _natural_key: List[str] = None
+    # Largest IN list sent by the get_many_* lookups.
+    IN_CHUNK_SIZE = 500
+    # Seconds the results of get_db_results() stay in the process-wide
+    # query_cache; None disables caching. Meant for small, rarely written tables.
+    _cache_ttl: Optional[float] = None
 
     @classmethod
     def get_db_manager(cls) -> BaseDBManager:
@@ -33,8 +144,8 @@ class BaseModel:
         placeholders = ", ".join(["%s"] * len(self.get_columns()))
         return f"INSERT INTO {self.get_table_name()} ({columns}) VALUES ({placeholders})"
 
-    def _get_update_query(self) -> str:
-        columns = self.get_columns()
+    def _get_update_query(self, columns: Optional[List[str]] = None) -> str:
+        columns = columns or self.get_columns()
         set_clause = ", ".join([f"{col} = %s" for col in columns])
         return f"UPDATE {self.get_table_name()} SET {set_clause} WHERE id = %s"
 
@@ -50,33 +161,164 @@ class BaseModel:
         return tuple(values)
 
     @classmethod
-    def from_db(cls, row: tuple):
+    def select_fields(cls, columns: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+        """`id` followed by `columns` (every column when None); unknown names raise ValueError."""
+        if columns is None:
+            return ("id",) + tuple(cls.get_columns())
+        unknown = [col for col in columns if col != "id" and col not in cls.get_columns()]
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no column(s) {unknown}")
+        return ("id",) + tuple(col for col in dict.fromkeys(columns) if col != "id")
+
+    @classmethod
+    def select_sql(cls, columns: Optional[Sequence[str]] = None) -> str:
+        """`SELECT <explicit field list> FROM <table>`, never `SELECT *`."""
+        return f"SELECT {', '.join(cls.select_fields(columns))} FROM {cls.get_table_name()}"
+
+    @classmethod
+    def _slot_names(cls) -> List[str]:
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get("__slots__", ()):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    @classmethod
+    def _row_factory(cls, fields: Optional[Tuple[str, ...]] = None) -> Callable[[tuple], "BaseModel"]:
+        """Constructor for rows holding `fields`, compiled once per class and field list."""
+        fields = fields or cls.select_fields()
+        factories = cls.__dict__.get("_compiled_row_factories")
+        if factories is None:
+            factories = cls._compiled_row_factories = {}
+        factory = factories.get(fields)
+        if factory is None:
+            layout = cls.select_fields()
+            unknown = [f for f in fields if f not in layout]
+            if unknown:
+                raise ValueError(f"{cls.__name__} has no column(s) {unknown}")
+            lines = ["def from_row(row):", "    obj = new(cls)", f"    {', '.join(f'obj.{f}' for f in fields)}, = row"]
+            lines += [f"    obj.{name} = None" for name in cls._slot_names() if name not in fields and name != "_loaded"]
+            if fields == layout:
+                lines.append("    obj._loaded = row")
+            else:
+                # Snapshot in id + _columns order; columns not selected count as None, so
+                # save() leaves them alone unless they are assigned a value.
+                snapshot = [f"row[{fields.index(f)}]" if f in fields else "None" for f in layout]
+                lines.append(f"    obj._loaded = ({', '.join(snapshot)},)")
+            lines.append("    return obj")
+            namespace = {"new": object.__new__, "cls": cls}
+            exec("\n".join(lines), namespace)
+            factory = factories[fields] = namespace["from_row"]
+        return factory
+
+    @classmethod
+    def from_db(cls, row: tuple, fields: Optional[Tuple[str, ...]] = None):
+        """Model for a row holding `fields`, as emitted by select_sql() (the full row by default)."""
         if not row:
             return None
 
-        columns = ["id"] + cls._columns
-        data = dict(zip(columns, row))
-        return cls(**data)
+        return cls._row_factory(fields)(row)
+
+    @classmethod
+    def from_db_rows(cls, rows: Iterable[tuple], fields: Optional[Tuple[str, ...]] = None) -> List["BaseModel"]:
+        factory = cls._row_factory(fields)
+        return [factory(row) for row in rows]
+
+    @classmethod
+    def _cache_table(cls) -> tuple:
+        return cls.get_db_manager().config_prefix, cls.get_table_name()
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Drop the cached results of this model's table once the write commits; call after raw SQL writes."""
+        cls.get_db_manager().after_commit(cls._drop_cached)
+
+    @classmethod
+    def _drop_cached(cls) -> None:
+        query_cache.invalidate(cls._cache_table())
+
+    @classmethod
+    def _fetch_rows(cls, query: str, params: tuple, fetch_one: bool):
+        """Run a model read through the query cache when `_cache_ttl` is set and no transaction is open."""
+        db = cls.get_db_manager()
+        if not cls._cache_ttl or db.in_transaction():
+            return db.execute_query(query, params, fetch_one=fetch_one, fetch_all=not fetch_one, prepared=True)
+
+        table = cls._cache_table()
+        key = (table, query, tuple(params), fetch_one)
+        rows = query_cache.get(table, key)
+        if rows is MISSING:
+            generation = query_cache.generation(table)
+            rows = db.execute_query(query, params, fetch_one=fetch_one, fetch_all=not fetch_one, prepared=True)
+            rows = rows if fetch_one else tuple(rows or ())
+            query_cache.put(table, key, rows, cls._cache_ttl, generation)
+        return rows
 
     @classmethod
-    def get_db_results(cls, query: str, params: tuple, fetch_one=False):
+    def get_db_results(cls, query: str, params: tuple, fetch_one=False, fields: Optional[Tuple[str, ...]] = None):
+        """Run `query`, which selects `fields` in that order, and return models."""
         try:
+            identity_map = current_identity_map()
+            if fields is not None and fields == cls.select_fields():
+                fields = None
+            if identity_map is not None and fields is not None:
+                identity_map = None
             if fetch_one:
-                row = cls.get_db_manager().execute_query(query, params, fetch_one=True)
-                return cls.from_db(row)
+                row = cls._fetch_rows(query, params, fetch_one=True)
+                obj = cls.from_db(row, fields)
+                return identity_map.add(obj) if identity_map is not None else obj
             else:
-                rows = cls.get_db_manager().execute_query(query, params, fetch_all=True)
-                return [cls.from_db(row) for row in rows] if rows else []
+                rows = cls._fetch_rows(query, params, fetch_one=False)
+                objs = cls.from_db_rows(rows, fields) if rows else []
+                return [identity_map.add(obj) for obj in objs] if identity_map is not None else objs
         except Exception as e:
             logging.error(f"Fetch db failed: {e}")
             raise
 
+    @classmethod
+    async def aget_db_results(cls, query: str, params: tuple, fetch_one=False, fields: Optional[Tuple[str, ...]] = None):
+        """Async variant of get_db_results(), run on the manager's executor."""
+        return await cls.get_db_manager().run_async(cls.get_db_results, query, params, fetch_one=fetch_one, fields=fields)
+
+    @classmethod
+    def iter_db_results(
+        cls, query: str, params: tuple, batch_size: int = 1000, fields: Optional[Tuple[str, ...]] = None
+    ) -> Iterator["BaseModel"]:
+        """Like get_db_results, but streams models without materializing the full result set."""
+        factory = cls._row_factory(fields)
+        for row in cls.get_db_manager().iter_query(query, params, batch_size=batch_size):
+            yield factory(row)
+
+    def _snapshot(self) -> None:
+        self._loaded = (self.id,) + self._get_values_for_db()
+
+    def dirty_fields(self) -> List[str]:
+        """Columns changed since the row was loaded or last saved."""
+        loaded = getattr(self, "_loaded", None)
+        columns = self.get_columns()
+        if loaded is None or loaded[0] != self.id or len(loaded) != len(columns) + 1:
+            return list(columns)
+        return [
+            col for col, old in zip(columns, loaded[1:])
+            if _comparable(getattr(self, col, None)) != _comparable(old)
+        ]
+
+    def has_changes(self) -> bool:
+        """Whether save() would write anything."""
+        return not self.id or bool(self.dirty_fields())
+
     def save(self) -> bool:
+        """Insert the object or update its dirty columns; returns False if the write failed."""
         try:
             if self.id:
-                self._update()
+                rowcount = self._update()
+                logging.debug(f"Save record {self.get_table_name()}(id={self.id}): {rowcount} row(s) modified")
             else:
                 self._insert()
+            identity_map = current_identity_map()
+            if identity_map is not None:
+                identity_map.refresh(self)
             return True
         except Exception as e:
             logging.debug(f"Save record {self.get_table_name()} failed")
@@ -87,51 +329,332 @@ class BaseModel:
         params = self._get_values_for_db()
 
         self.id, _ = self.get_db_manager().execute_query(query, params)
-    
-    def _update(self) -> None:
-        query = self._get_update_query()
-        params = self._get_values_for_db(include_id=True)
+        self.invalidate_cache()
+        self._snapshot()
 
-        self.get_db_manager().execute_query(query, params)
+    def _update(self) -> int:
+        dirty = self.dirty_fields()
+        if not dirty:
+            return 0
+
+        query = self._get_update_query(dirty)
+        params = tuple(getattr(self, col, None) for col in dirty) + (self.id,)
+
+        _, rowcount = self.get_db_manager().execute_query(query, params)
+        self.invalidate_cache()
+        self._snapshot()
+        return rowcount
 
     @classmethod
-    def get_by_id(cls, id: str):
+    def get_by_id(cls, id: str, columns: Optional[Sequence[str]] = None):
         if not id:
             return None
 
-        query = f"SELECT * FROM {cls.get_table_name()} WHERE id = %s"
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            obj = identity_map.get(cls, id)
+            if obj is not None:
+                return obj
+
+        fields = cls.select_fields(columns)
+        query = f"{cls.select_sql(fields)} WHERE id = %s"
         params = (id, )
 
-        # row = cls.get_db_manager().execute_query(query, params, fetch_one=True)
-        # obj = cls.from_db(row)
-        return cls.get_db_results(query, params, fetch_one=True)
+        return cls.get_db_results(query, params, fetch_one=True, fields=fields)
+
+    @classmethod
+    def get_one_by(cls, columns: List[str], values: tuple):
+        """First row whose `columns` equal `values`, remembered by the identity scope."""
+        columns = tuple(columns)
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            obj = identity_map.get_by_key(cls, columns, tuple(values))
+            if obj is not None:
+                return obj
+
+        where = " and ".join(f"{col} = %s" for col in columns)
+        query = f"{cls.select_sql()} WHERE {where}"
+        obj = cls.get_db_results(query, tuple(values), fetch_one=True)
+        if identity_map is not None and obj is not None:
+            identity_map.add_key(obj, columns)
+        return obj
+
+    @classmethod
+    async def aget_by_id(cls, id: str):
+        return await cls.get_db_manager().run_async(cls.get_by_id, id)
+
+    @classmethod
+    def get_all(cls, columns: Optional[Sequence[str]] = None):
+        fields = cls.select_fields(columns)
+        query = cls.select_sql(fields)
+        params = ()
+
+        return cls.get_db_results(query, params, fields=fields)
 
     @classmethod
-    def get_all(cls):
-        query = f"SELECT * FROM {cls.get_table_name()}"
+    async def aget_all(cls):
+        return await cls.get_db_manager().run_async(cls.get_all)
+
+    @classmethod
+    def iter_all(cls, batch_size: int = 1000, columns: Optional[Sequence[str]] = None) -> Iterator["BaseModel"]:
+        fields = cls.select_fields(columns)
+        query = cls.select_sql(fields)
         params = ()
 
-        return cls.get_db_results(query, params)
+        return cls.iter_db_results(query, params, batch_size=batch_size, fields=fields)
+
+    @classmethod
+    def get_page(
+        cls,
+        where: str,
+        params: tuple,
+        keyset: Keyset,
+        cursor: Optional[str] = None,
+        page_size: int = 100,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[List["BaseModel"], Optional[str]]:
+        """One page of the rows matching `where` in `keyset` order after `cursor`, with the next page's cursor."""
+        if columns is not None:
+            columns = list(columns) + [expression for expression, _ in keyset.order if expression not in columns]
+        fields = cls.select_fields(columns)
+        seek_sql, seek_params = keyset.seek(cursor)
+        query = (
+            f"{cls.select_sql(fields)} WHERE ({where}) {seek_sql} "
+            f"ORDER BY {keyset.order_by} LIMIT %s"
+        )
+        objs = cls.get_db_results(query, tuple(params) + tuple(seek_params) + (page_size + 1,), fields=fields)
+        if len(objs) <= page_size:
+            return objs, None
+        objs = objs[:page_size]
+        last = objs[-1]
+        return objs, keyset.cursor([getattr(last, expression) for expression, _ in keyset.order])
 
     @classmethod
-    def bulk_insert(cls, objs: Iterable["BaseModel"]) -> int:
+    def bulk_insert(cls, objs: Iterable["BaseModel"], chunk_size: int = 500) -> int:
+        """Insert `objs` with one multi-row INSERT per chunk and set their ids; returns the rows inserted."""
         objs = list(objs)
         if not objs:
             return 0
 
         columns = cls.get_columns()
-        columns_sql = ", ".join(columns)
-        placeholders = ", ".join(["%s"] * len(columns))
-        sql = f"INSERT INTO {cls.get_table_name()} ({columns_sql}) VALUES ({placeholders})"
+        table = cls.get_table_name()
+        placeholders = f"({', '.join(['%s'] * len(columns))})"
+        db = cls.get_db_manager()
+        rowcount = 0
+        with db.transaction():
+            consecutive = db.consecutive_insert_ids()
+            size = chunk_size if consecutive or cls._natural_key else 1
+            for start in range(0, len(objs), size):
+                chunk = objs[start:start + size]
+                sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([placeholders] * len(chunk))}"
+                params = tuple(getattr(obj, col, None) for obj in chunk for col in columns)
+                with db.get_cursor() as cursor:
+                    cursor.execute(sql, params)
+                    rowcount += cursor.rowcount
+                    ids = db.inserted_ids(cursor, len(chunk)) if consecutive or len(chunk) == 1 else None
+                cls.invalidate_cache()
+                if ids is None:
+                    ids = cls._ids_by_natural_key(chunk)
+
+                for obj, id in zip(chunk, ids):
+                    obj.id = id
+                    if id:
+                        obj._snapshot()
+
+            identity_map = current_identity_map()
+            if identity_map is not None:
+                for obj in objs:
+                    identity_map.refresh(obj)
+
+        return rowcount
+
+    @classmethod
+    def _ids_by_natural_key(cls, objs: List["BaseModel"]) -> List[Optional[int]]:
+        """Ids of the rows holding the natural keys of `objs`, None where no row matches."""
+        key_columns = list(cls._natural_key)
+        keys = [tuple(getattr(obj, col, None) for col in key_columns) for obj in objs]
+        rows = cls._rows_by_key(key_columns, keys, [])
+        return [rows[key][0] if key in rows else None for key in keys]
+
+    @classmethod
+    def _rows_by_key(cls, key_columns: List[str], keys: List[tuple], columns: List[str]) -> Dict[tuple, tuple]:
+        """`id` + `columns` of the row each of `keys` matches, compared by the database under its collation."""
+        # One indexed lookup per key, tagged with the key's position: the database, not Python,
+        # decides which row a key differing in case or width from the stored one belongs to.
+        select = ", ".join(["id"] + columns)
+        where = " AND ".join(f"{col} = %s" for col in key_columns)
+        table = cls.get_table_name()
+        db = cls.get_db_manager()
+        result = {}
+        for start in range(0, len(keys), cls.IN_CHUNK_SIZE):
+            chunk = keys[start:start + cls.IN_CHUNK_SIZE]
+            query = " UNION ALL ".join(f"SELECT {i}, {select} FROM {table} WHERE {where}" for i in range(len(chunk)))
+            rows = db.execute_query(query, tuple(value for key in chunk for value in key), fetch_all=True)
+            for row in rows or []:
+                result[chunk[row[0]]] = tuple(row[1:])
+        return result
+
+    @classmethod
+    def _in_chunks(cls, keys: List, chunk_size: int) -> Iterator[List]:
+        """Chunks of at most `chunk_size` keys, the last padded to a power of two to bound statement shapes."""
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            size = 1
+            while size < len(chunk):
+                size *= 2
+            yield chunk + [chunk[-1]] * (min(size, chunk_size) - len(chunk))
+
+    @classmethod
+    def get_many_by_ids(
+        cls, ids: Iterable, chunk_size: Optional[int] = None, columns: Optional[Sequence[str]] = None
+    ) -> Dict[int, "BaseModel"]:
+        """Rows for `ids`, fetched with bounded IN lists, keyed by id. Missing ids are absent."""
+        result = {}
+        wanted = []
+        identity_map = current_identity_map()
+        for id in dict.fromkeys(ids):
+            if not id:
+                continue
+            obj = identity_map.get(cls, id) if identity_map is not None else None
+            if obj is not None:
+                result[id] = obj
+            else:
+                wanted.append(id)
+
+        fields = cls.select_fields(columns)
+        select = cls.select_sql(fields)
+        for chunk in cls._in_chunks(wanted, chunk_size or cls.IN_CHUNK_SIZE):
+            query = f"{select} WHERE id IN ({', '.join(['%s'] * len(chunk))})"
+            for obj in cls.get_db_results(query, tuple(chunk), fields=fields):
+                result[obj.id] = obj
+        return result
+
+    @classmethod
+    def get_many_by(
+        cls, columns: List[str], key_tuples: Iterable[tuple], chunk_size: Optional[int] = None
+    ) -> Dict[tuple, "BaseModel"]:
+        """Rows whose `columns` match any of `key_tuples`, keyed by those values."""
+        columns = tuple(columns)
+        result = {}
+        wanted = []
+        identity_map = current_identity_map()
+        for key in dict.fromkeys(tuple(key) for key in key_tuples):
+            if any(value is None for value in key):
+                continue
+            obj = identity_map.get_by_key(cls, columns, key) if identity_map is not None else None
+            if obj is not None:
+                result[key] = obj
+            else:
+                wanted.append(key)
+
+        select = cls.select_sql()
+        for chunk in cls._in_chunks(wanted, chunk_size or cls.IN_CHUNK_SIZE):
+            query = f"{select} WHERE {cls._key_predicate(list(columns), len(chunk))}"
+            params = tuple(value for key in chunk for value in key)
+            for obj in cls.get_db_results(query, params):
+                result[tuple(getattr(obj, col) for col in columns)] = obj
+                if identity_map is not None:
+                    identity_map.add_key(obj, columns)
+        return result
+
+    @classmethod
+    def _key_predicate(cls, key_columns: List[str], count: int) -> str:
+        if len(key_columns) == 1:
+            return f"{key_columns[0]} IN ({', '.join(['%s'] * count)})"
+        row = f"({', '.join(['%s'] * len(key_columns))})"
+        return f"({', '.join(key_columns)}) IN ({', '.join([row] * count)})"
+
+    @classmethod
+    def bulk_upsert(
+        cls,
+        objs: Iterable["BaseModel"],
+        key_columns: Optional[List[str]] = None,
+        update_columns: Optional[List[str]] = None,
+        chunk_size: int = 500,
+    ) -> Dict[str, int]:
+        """Insert or update `objs` by natural key; returns counts of inserted, updated and unchanged objects."""
+        key_columns = list(key_columns or cls._natural_key or [])
+        if not key_columns:
+            raise ValueError(f"Class {cls.__name__} must define _natural_key or pass key_columns")
+        if update_columns is None:
+            update_columns = [col for col in cls.get_columns() if col not in key_columns]
+        columns = key_columns + [col for col in cls.get_columns() if col not in key_columns]
+        # Only when every column is written does the object match its row afterwards.
+        full_row = set(key_columns) | set(update_columns) >= set(cls.get_columns())
 
-        params_list = []
+        by_key: Dict[tuple, List["BaseModel"]] = {}
         for obj in objs:
-            row = []
-            for col in columns:
-                row.append(getattr(obj, col, None))
-            params_list.append(tuple(row))
+            key = tuple(getattr(obj, col, None) for col in key_columns)
+            if any(value is None for value in key):
+                raise ValueError(f"{cls.__name__}.bulk_upsert: natural key {key_columns} of {key} contains NULL")
+            by_key.setdefault(key, []).append(obj)
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if not by_key:
+            return counts
 
         db = cls.get_db_manager()
-        with db.get_cursor() as cursor:
-            cursor.executemany(sql, params_list)
-            return cursor.rowcount
\ No newline at end of file
+        table = cls.get_table_name()
+        upsert_clause = db.upsert_clause(key_columns, update_columns)
+        keys = list(by_key)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            with db.transaction():
+                existing = cls._rows_by_key(key_columns, chunk, update_columns)
+
+                to_write = []
+                new_keys = []
+                for key in chunk:
+                    obj = by_key[key][-1]
+                    row = existing.get(key)
+                    if row is None:
+                        new_keys.append(key)
+                        to_write.append(obj)
+                        continue
+                    for duplicate in by_key[key]:
+                        duplicate.id = row[0]
+                    if all(
+                        _comparable(getattr(obj, col, None)) == _comparable(value)
+                        for col, value in zip(update_columns, row[1:])
+                    ):
+                        counts["unchanged"] += 1
+                        if full_row:
+                            obj._snapshot()
+                    else:
+                        counts["updated"] += 1
+                        to_write.append(obj)
+
+                if not to_write:
+                    continue
+
+                placeholders = f"({', '.join(['%s'] * len(columns))})"
+                sql = (
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES {', '.join([placeholders] * len(to_write))} {upsert_clause}"
+                )
+                params = tuple(getattr(obj, col, None) for obj in to_write for col in columns)
+                db.execute_query(sql, params)
+                cls.invalidate_cache()
+
+                if new_keys:
+                    inserted = cls._rows_by_key(key_columns, new_keys, [])
+                    for key, row in inserted.items():
+                        for obj in by_key[key]:
+                            obj.id = row[0]
+                    # New keys the collation treats as equal share one row: the first inserted it.
+                    rows_added = len({row[0] for row in inserted.values()})
+                    counts["inserted"] += rows_added
+                    counts["updated"] += len(new_keys) - rows_added
+
+                if full_row:
+                    for obj in to_write:
+                        if obj.id:
+                            obj._snapshot()
+
+                identity_map = current_identity_map()
+                if identity_map is not None:
+                    for obj in to_write:
+                        identity_map.refresh(obj)
+
+        return counts
+
@@ -0,0 +1,99 @@
+import contextvars
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+
+_current = contextvars.ContextVar("identity_map", default=None)
+
+
+class IdentityMap:
+    """Model instances loaded in one scope, keyed by (model, id) and by the unique-key lookups that found them."""
+
+    def __init__(self, name: str = "scope") -> None:
+        self.name = name
+        self._by_id: Dict[tuple, object] = {}
+        self._by_key: Dict[tuple, object] = {}
+        # id(obj) -> {key columns: key registered for it}
+        self._keys_of: Dict[int, Dict[Tuple[str, ...], tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cls, id) -> Optional[object]:
+        obj = self._by_id.get((cls, id))
+        if obj is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return obj
+
+    def get_by_key(self, cls, columns: Tuple[str, ...], values: tuple) -> Optional[object]:
+        obj = self._by_key.get((cls, columns, values))
+        if obj is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return obj
+
+    def add(self, obj):
+        """Register a freshly loaded instance, or return the one already mapped to its row."""
+        if obj is None or not obj.id:
+            return obj
+        existing = self._by_id.setdefault((type(obj), obj.id), obj)
+        if existing is obj and obj._natural_key:
+            self.add_key(obj, tuple(obj._natural_key))
+        return existing
+
+    def add_key(self, obj, columns: Sequence[str]) -> None:
+        columns = tuple(columns)
+        key = (type(obj), columns, tuple(getattr(obj, col, None) for col in columns))
+        self._by_key[key] = obj
+        self._keys_of.setdefault(id(obj), {})[columns] = key
+
+    def refresh(self, obj) -> None:
+        """`obj` was just written: make it the instance for its row and re-key it on its current values."""
+        if not obj.id:
+            return
+        previous = self._by_id.get((type(obj), obj.id))
+        if previous is not None and previous is not obj:
+            self._forget_keys(previous)
+        self._by_id[(type(obj), obj.id)] = obj
+        columns_list = list(self._forget_keys(obj))
+        if obj._natural_key and tuple(obj._natural_key) not in columns_list:
+            columns_list.append(tuple(obj._natural_key))
+        for columns in columns_list:
+            self.add_key(obj, columns)
+
+    def _forget_keys(self, obj) -> Dict[Tuple[str, ...], tuple]:
+        keys = self._keys_of.pop(id(obj), {})
+        for key in keys.values():
+            if self._by_key.get(key) is obj:
+                del self._by_key[key]
+        return keys
+
+    def stats(self) -> Dict:
+        return {"objects": len(self._by_id), "hits": self.hits, "misses": self.misses}
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    return _current.get()
+
+
+@contextmanager
+def identity_scope(name: str = "scope"):
+    """Let BaseModel lookups inside the block reuse instances already loaded in this scope."""
+    if _current.get() is not None:
+        yield _current.get()
+        return
+
+    identity_map = IdentityMap(name)
+    token = _current.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _current.reset(token)
+        stats = identity_map.stats()
+        logging.info(
+            f"IdentityMap({name}): {stats['hits']} lookup(s) served from memory, "
+            f"{stats['misses']} sent to the database, {stats['objects']} object(s) mapped"
+        )
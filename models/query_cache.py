@@ -0,0 +1,86 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+
+
+MISSING = object()
+
+
+class QueryCache:
+    """Bounded LRU of raw query results with a TTL, grouped by table so a write drops its table."""
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, object]]" = OrderedDict()
+        # table -> number of invalidations, so a read that raced a write is not stored.
+        self._generations: Dict[Hashable, int] = {}
+        self._counters: Dict[Hashable, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, table: Hashable, event: str) -> None:
+        counters = self._counters.setdefault(table, {"hits": 0, "misses": 0, "invalidations": 0})
+        counters[event] += 1
+
+    def get(self, table: Hashable, key: Hashable):
+        """The cached result for `key`, or MISSING when absent or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._count(table, "misses")
+                return MISSING
+            self._entries.move_to_end(key)
+            self._count(table, "hits")
+            return entry[2]
+
+    def generation(self, table: Hashable) -> int:
+        with self._lock:
+            return self._generations.get(table, 0)
+
+    def put(self, table: Hashable, key: Hashable, value, ttl: float, generation: int) -> None:
+        """Store `value` unless `table` was invalidated since `generation` was read."""
+        with self._lock:
+            if self._generations.get(table, 0) != generation:
+                return
+            self._entries[key] = (table, time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, table: Hashable) -> None:
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[0] == table]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._count(table, "invalidations")
+
+    def clear(self) -> None:
+        with self._lock:
+            for table in {entry[0] for entry in self._entries.values()}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sizes: Dict[Hashable, int] = {}
+            for table, _, _ in self._entries.values():
+                sizes[table] = sizes.get(table, 0) + 1
+            tables = {}
+            for table, counters in self._counters.items():
+                lookups = counters["hits"] + counters["misses"]
+                name = ".".join(table) if isinstance(table, tuple) else str(table)
+                tables[name] = {
+                    **counters,
+                    "entries": sizes.get(table, 0),
+                    "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+                }
+            return {"entries": len(self._entries), "max_size": self.max_size, "tables": tables}
+
+
+query_cache = QueryCache()
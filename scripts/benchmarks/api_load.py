@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+DEFAULT_PATHS = [
+    "/api/prefectures",
+    "/api/cities?pref_id=13",
+    "/api/fuke/search?pref_id=13&page=1&page_size=12",
+    "/api/manhole-card/search?pref_id=13&page=1&page_size=12",
+]
+
+
+async def run(base_url: str, paths: list, concurrency: int, duration: float) -> dict:
+    """
+    Keep `concurrency` clients requesting `paths` in turn against a running server for
+    `duration` seconds and report requests/sec and latency percentiles.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def client(session: aiohttp.ClientSession, offset: int) -> None:
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url.rstrip("/") + paths[i % len(paths)]) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            i += 1
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session, i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    """
+    Start the API first, e.g. with a single worker:
+        uvicorn main:app --workers 1
+
+    Usage:
+        python scripts/benchmarks/api_load.py
+        python scripts/benchmarks/api_load.py --concurrency 50 200 500 --duration 20
+    """
+    parser = argparse.ArgumentParser(description="Requests/sec of the search API at increasing concurrency.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="Endpoint to request (repeatable).")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for concurrency in args.concurrency:
+        result = asyncio.run(run(args.base_url, args.paths or DEFAULT_PATHS, concurrency, args.duration))
+        print(
+            f"concurrency={result['concurrency']:>4} requests={result['requests']} errors={result['errors']} "
+            f"rps={result['rps']:.0f} p50_ms={result['p50_ms']:.1f} p99_ms={result['p99_ms']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
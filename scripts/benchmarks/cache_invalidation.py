@@ -0,0 +1,93 @@
+import argparse
+import logging
+import sys
+import threading
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/cache_invalidation.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.administration import Prefecture, reference_data
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def check(pref_id: int, timeout: float) -> list:
+    """
+    Update a prefecture in a transaction and read it from another thread after the write
+    but before the commit. Returns the reads that still see the old value once committed.
+    """
+    prefecture = Prefecture.get_one_by(["pref_id"], (pref_id,))
+    if prefecture is None:
+        raise SystemExit(f"no prefecture with pref_id={pref_id}")
+    original = prefecture.full_name
+    marker = f"{original}*"
+
+    written = threading.Event()
+    read_done = threading.Event()
+    errors = []
+
+    def writer() -> None:
+        try:
+            with Prefecture.get_db_manager().transaction():
+                prefecture.full_name = marker
+                if not prefecture.save():
+                    raise RuntimeError("save() failed")
+                written.set()
+                read_done.wait(timeout)
+        except Exception as e:
+            errors.append(e)
+            written.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        written.wait(timeout)
+        # Inside the window: the write ran, the commit has not.
+        Prefecture.get_all()
+        reference_data.by_pref_id(pref_id)
+        read_done.set()
+        thread.join()
+        if errors:
+            raise SystemExit(f"writer failed: {errors[0]}")
+
+        stale = []
+        if {p.pref_id: p.full_name for p in Prefecture.get_all()}.get(pref_id) != marker:
+            stale.append("Prefecture.get_all")
+        if reference_data.by_pref_id(pref_id).full_name != marker:
+            stale.append("reference_data.by_pref_id")
+        return stale
+    finally:
+        read_done.set()
+        thread.join()
+        prefecture.full_name = original
+        prefecture.save()
+
+
+def main() -> None:
+    """
+    Runs against the database configured by the DB_* settings; exits non-zero when a read
+    made between a write and its commit leaves a stale entry in the query cache.
+
+    Usage:
+        python scripts/benchmarks/cache_invalidation.py
+        python scripts/benchmarks/cache_invalidation.py --pref-id 1
+    """
+    parser = argparse.ArgumentParser(description="Check that the query cache never keeps pre-commit reads.")
+    parser.add_argument("--pref-id", type=int, default=13)
+    parser.add_argument("--timeout", type=float, default=10)
+    args = parser.parse_args()
+
+    stale = check(args.pref_id, args.timeout)
+    if stale:
+        print(f"FAIL stale after commit: {', '.join(stale)}")
+        sys.exit(1)
+    print("ok   reads between write and commit were not cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/city_matcher.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.settings import TMP_ROOT
+from manhole_card.etl.migrator import ManholeCardMigrator
+from models.administration import reference_data
+from utils.city_matcher import load_city_matchers
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def load_corpus(root: Path) -> list:
+    """(pref_id, text) pairs the migrators match cities in, from the staged fuke and manhole card data."""
+    corpus = []
+    for data_file in sorted(root.glob("fuke/*/data.json")):
+        prefecture = reference_data.by_en_name(data_file.parent.name)
+        if not prefecture:
+            continue
+        for record in json.loads(data_file.read_text(encoding="utf-8")):
+            lines = (record.get("location") or "").split("\n")
+            if len(lines) > 1:
+                corpus.append((prefecture.pref_id, lines[1]))
+
+    for data_file in sorted(root.glob("manhole_card/*/data.json")):
+        prefecture = reference_data.by_en_name(data_file.parent.name)
+        if not prefecture:
+            continue
+        for record in json.loads(data_file.read_text(encoding="utf-8")):
+            for _, address in ManholeCardMigrator._parse_locations(record.get("location") or "", prefecture.full_name):
+                corpus.append((prefecture.pref_id, address))
+    return corpus
+
+
+def linear_scan(cities_by_pref: dict, pref_id: int, text: str):
+    """The matching the migrators did before CityMatcher."""
+    for name, city_id in cities_by_pref.get(pref_id) or []:
+        if name and name in text:
+            return city_id
+    return None
+
+
+def main() -> None:
+    """
+    Runs over the data staged under TMP_ROOT by the ingestors and the cities in the database.
+
+    Usage:
+        python scripts/benchmarks/city_matcher.py
+        python scripts/benchmarks/city_matcher.py --repeat 20
+    """
+    parser = argparse.ArgumentParser(description="Linear city name scan vs. the Aho-Corasick CityMatcher.")
+    parser.add_argument("--root", type=Path, default=TMP_ROOT, help="Directory holding fuke/ and manhole_card/.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.root)
+    if not corpus:
+        raise SystemExit(f"no staged fuke or manhole card data under {args.root}")
+
+    cities_by_pref = {}
+    for pref_id, cities in reference_data.cities_by_pref().items():
+        cities_by_pref[pref_id] = sorted(((c.name, c.id) for c in cities if c.name), key=lambda item: len(item[0]), reverse=True)
+
+    started = time.perf_counter()
+    matchers = load_city_matchers()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    expected = [linear_scan(cities_by_pref, pref_id, text) for pref_id, text in corpus]
+    actual = [matchers[pref_id].find(text) if pref_id in matchers else None for pref_id, text in corpus]
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+
+    def timed(match) -> float:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for pref_id, text in corpus:
+                match(pref_id, text)
+        return (time.perf_counter() - started) / (args.repeat * len(corpus)) * 1e6
+
+    linear_us = timed(lambda pref_id, text: linear_scan(cities_by_pref, pref_id, text))
+    automaton_us = timed(lambda pref_id, text: matchers[pref_id].find(text) if pref_id in matchers else None)
+
+    print(
+        f"texts={len(corpus)} matched={sum(1 for a in actual if a)} mismatches={mismatches} build_ms={build_ms:.1f} "
+        f"linear_us={linear_us:.2f} automaton_us={automaton_us:.2f} speedup={linear_us / automaton_us:.1f}x"
+    )
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/column_projection.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from jpost.models.jpost import Fuke
+from manhole_card.model import ManholeCard
+from models.administration import Facility
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+# (label, model, columns to project, WHERE clause) of the lookups the API and ETL run most.
+LOOKUPS = [
+    ("Facility by id range", Facility, Facility.LIGHT_COLUMNS, "id <= %s"),
+    ("ManholeCard by id range", ManholeCard, ["name", "series", "image_url", "pref_id"], "id <= %s"),
+    ("Fuke by id range", Fuke, ["name", "abolition", "image_url", "jpost_id"], "id <= %s"),
+]
+
+
+def payload_bytes(rows: list) -> int:
+    """Approximate result set size: UTF-8 length of text, 8 bytes per other non-NULL value."""
+    total = 0
+    for row in rows:
+        for value in row:
+            if value is None:
+                continue
+            if isinstance(value, str):
+                total += len(value.encode("utf-8"))
+            elif isinstance(value, (bytes, bytearray)):
+                total += len(value)
+            else:
+                total += 8
+    return total
+
+
+def measure(model, query: str, params: tuple, fields, repeat: int) -> dict:
+    db = model.get_db_manager()
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = db.execute_query(query, params, fetch_all=True, prepared=True) or []
+        model.from_db_rows(rows, fields)
+        timings.append(time.perf_counter() - started)
+    return {"rows": len(rows), "bytes": payload_bytes(rows), "p50_ms": statistics.median(timings) * 1000}
+
+
+def main() -> None:
+    """
+    Runs against the database configured by the DB_* settings.
+
+    Usage:
+        python scripts/benchmarks/column_projection.py
+        python scripts/benchmarks/column_projection.py --rows 5000 --repeat 50
+    """
+    parser = argparse.ArgumentParser(description="Bytes and latency of full-row vs projected model lookups.")
+    parser.add_argument("--rows", type=int, default=1000, help="Upper id bound of each lookup.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, model, columns, where in LOOKUPS:
+        full = measure(model, f"{model.select_sql()} WHERE {where}", (args.rows,), None, args.repeat)
+        fields = model.select_fields(columns)
+        projected = measure(model, f"{model.select_sql(fields)} WHERE {where}", (args.rows,), fields, args.repeat)
+        saved = 1 - projected["bytes"] / full["bytes"] if full["bytes"] else 0.0
+        print(
+            f"{label:<26} rows={full['rows']:>6} "
+            f"bytes={full['bytes']:>10,} -> {projected['bytes']:>10,} ({saved:.0%} less) "
+            f"p50_ms={full['p50_ms']:.2f} -> {projected['p50_ms']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
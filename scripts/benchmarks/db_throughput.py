@@ -0,0 +1,108 @@
+import argparse
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/db_throughput.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.database import db_manager
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def _query_with_commit(query: str) -> None:
+    """A read followed by an explicit COMMIT, as every SELECT was issued before the read-only path."""
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, ())
+        cursor.fetchall()
+        cursor.close()
+        conn.commit()
+    finally:
+        db_manager.release_connection()
+
+
+def run(query: str, threads: int, duration: float, commit_reads: bool = False) -> dict:
+    """
+    Hammer db_manager.execute_query from `threads` threads for `duration` seconds
+    and return the achieved queries per second, mean latency and the pool stats.
+    """
+    stop = threading.Event()
+    counts = [0] * threads
+    errors = [0] * threads
+
+    def worker(idx: int) -> None:
+        while not stop.is_set():
+            try:
+                if commit_reads:
+                    _query_with_commit(query)
+                else:
+                    db_manager.execute_query(query, (), fetch_one=True)
+                counts[idx] += 1
+            except Exception:
+                errors[idx] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    time.sleep(duration)
+    stop.set()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "threads": threads,
+        "queries": sum(counts),
+        "errors": sum(errors),
+        "qps": sum(counts) / elapsed,
+        "latency_ms": (elapsed * threads * 1000 / sum(counts)) if sum(counts) else 0.0,
+        "pool": db_manager.pool_stats(),
+    }
+
+
+def main() -> None:
+    """
+    Usage:
+        python scripts/benchmarks/db_throughput.py --threads 1 8 32
+        python scripts/benchmarks/db_throughput.py --ping-every-checkout   # previous liveness policy
+        python scripts/benchmarks/db_throughput.py --commit-reads          # previous COMMIT after SELECT
+    """
+    parser = argparse.ArgumentParser(description="Query throughput through BaseDBManager.")
+    parser.add_argument("--query", default="SELECT 1")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--ping-every-checkout",
+        action="store_true",
+        help="Ping before every checkout, as the pool did before the idle-aware liveness policy.",
+    )
+    parser.add_argument(
+        "--commit-reads",
+        action="store_true",
+        help="Send a COMMIT after every read, as execute_query did before the read-only path.",
+    )
+    args = parser.parse_args()
+
+    if args.ping_every_checkout:
+        db_manager._pool.idle_check_secs = -1
+
+    for threads in args.threads:
+        result = run(args.query, threads, args.duration, commit_reads=args.commit_reads)
+        print(
+            f"threads={result['threads']:>3} qps={result['qps']:>10.1f} latency_ms={result['latency_ms']:.3f} "
+            f"queries={result['queries']} errors={result['errors']} pool={result['pool']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
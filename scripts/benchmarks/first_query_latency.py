@@ -0,0 +1,82 @@
+import argparse
+import logging
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/first_query_latency.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.database import DefaultDBManager
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def run(threads: int, warm: bool) -> dict:
+    """
+    Start `threads` threads at once on a fresh manager and measure how long each waits
+    for its first query to return (connection handshake included unless `warm`).
+    """
+    manager = DefaultDBManager(pool_size=threads)
+    warm_up_secs = 0.0
+    if warm:
+        started = time.perf_counter()
+        manager.warm_up(threads)
+        warm_up_secs = time.perf_counter() - started
+
+    barrier = threading.Barrier(threads + 1)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        barrier.wait()
+        started = time.perf_counter()
+        manager.execute_query("SELECT 1", (), fetch_one=True)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    for w in workers:
+        w.join()
+    manager.close_all_connections()
+
+    latencies.sort()
+    return {
+        "threads": threads,
+        "warm_up_ms": warm_up_secs * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main() -> None:
+    """
+    Usage:
+        python scripts/benchmarks/first_query_latency.py                 # lazy connects
+        python scripts/benchmarks/first_query_latency.py --warm          # pre-warmed pool
+        DB_USE_PURE=1 python scripts/benchmarks/first_query_latency.py   # unserialized connects
+    """
+    parser = argparse.ArgumentParser(description="Time to first query for a burst of threads.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--warm", action="store_true", help="Warm the pool up before the burst.")
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        result = run(threads, args.warm)
+        print(
+            f"threads={result['threads']:>3} warm_up_ms={result['warm_up_ms']:.1f} "
+            f"p50_ms={result['p50_ms']:.1f} max_ms={result['max_ms']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
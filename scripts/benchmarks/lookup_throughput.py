@@ -0,0 +1,65 @@
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/lookup_throughput.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.administration import City, Facility
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def run(lookups: int, seed: int = 0) -> dict:
+    """
+    Replay the migrators' hot lookups (City/Facility by name and prefecture) against
+    keys taken from the live tables and return lookups per second.
+    """
+    city_keys = [(c.name, c.pref_id) for c in City.iter_all() if c.name and c.pref_id]
+    facility_keys = [(f.name, f.pref_id) for f in Facility.iter_all() if f.name and f.pref_id]
+    if not city_keys or not facility_keys:
+        raise SystemExit("city and facility tables must not be empty")
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for i in range(lookups):
+        if i % 2:
+            City.get_by_name_and_pref(*rng.choice(city_keys))
+        else:
+            Facility.get_by_name_and_pref(*rng.choice(facility_keys))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "lookups": lookups,
+        "per_sec": lookups / elapsed,
+        "statements": City.get_db_manager().statement_cache_stats(),
+    }
+
+
+def main() -> None:
+    """
+    Usage:
+        python scripts/benchmarks/lookup_throughput.py
+        python scripts/benchmarks/lookup_throughput.py --no-prepared   # plain cursors
+    """
+    parser = argparse.ArgumentParser(description="Migrator lookup throughput with/without prepared statements.")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--no-prepared", action="store_true", help="Disable the prepared statement cache.")
+    args = parser.parse_args()
+
+    if args.no_prepared:
+        City.get_db_manager().statement_cache_size = 0
+
+    result = run(args.lookups)
+    print(f"lookups={result['lookups']} per_sec={result['per_sec']:.1f} statements={result['statements']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/query_budget.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from api.base import list_cities, list_prefectures
+from core.query_scope import QueryBudgetExceeded, query_scope
+from jpost.apis.fuke import search_fuke
+from manhole_card.apis.manhole_card import search_manhole_card
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+SEARCH_ARGS = {"page": 1, "page_size": 12, "cursor": None}
+
+# (endpoint, handler, arguments, most statements one call may run). The reference-data
+# endpoints cost a probe and two table reads when the registry (re)loads, nothing otherwise.
+ENDPOINTS = [
+    ("/api/prefectures", list_prefectures, {}, 3),
+    ("/api/cities", list_cities, {"pref_id": 13}, 3),
+    (
+        "/api/fuke/search",
+        search_fuke,
+        {"pref_id": 13, "city_id": None, "jpost_name": None, "abolition": None, **SEARCH_ARGS},
+        2,
+    ),
+    ("/api/manhole-card/search", search_manhole_card, {"pref_id": 13, "name": None, **SEARCH_ARGS}, 2),
+]
+
+
+async def check(repeat: int) -> int:
+    """Call every endpoint handler `repeat` times under a strict query budget; returns the number of failures."""
+    failures = 0
+    for path, handler, kwargs, budget in ENDPOINTS:
+        for _ in range(repeat):
+            try:
+                with query_scope(path, budget=budget, strict=True) as scope:
+                    await handler(**kwargs)
+            except QueryBudgetExceeded as e:
+                failures += 1
+                print(f"FAIL {e}: {scope.stats()}")
+                break
+        else:
+            print(f"ok   {path:<28} queries={scope.count} budget={budget}")
+    return failures
+
+
+def main() -> None:
+    """
+    Runs the API handlers in-process against the database configured by the DB_* settings.
+
+    Usage:
+        python scripts/benchmarks/query_budget.py
+        python scripts/benchmarks/query_budget.py --repeat 3
+    """
+    parser = argparse.ArgumentParser(description="Assert the per-request query budget of the API endpoints.")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    sys.exit(1 if asyncio.run(check(args.repeat)) else 0)
+
+
+if __name__ == "__main__":
+    main()
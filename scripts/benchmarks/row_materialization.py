@@ -0,0 +1,84 @@
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+# Allow running as a plain script:
+#   python3 scripts/benchmarks/row_materialization.py
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.administration import Facility
+
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class DictFacility:
+    """Facility as it was materialized before __slots__: kwargs dict, __init__, instance __dict__."""
+
+    def __init__(self, **kwargs) -> None:
+        self.id = kwargs.get("id")
+        self.name = kwargs.get("name")
+        self.type = kwargs.get("type")
+        self.address = kwargs.get("address")
+        self.postcode = kwargs.get("postcode")
+        self.latitude = kwargs.get("latitude")
+        self.longtitude = kwargs.get("longtitude")
+        self.business_hours = kwargs.get("business_hours")
+        self.pref_id = kwargs.get("pref_id")
+        self.city_id = kwargs.get("city_id")
+
+    @classmethod
+    def from_db(cls, row: tuple):
+        columns = ["id"] + Facility._columns
+        return cls(**dict(zip(columns, row)))
+
+
+def synthetic_rows(n: int) -> list:
+    return [
+        (
+            i, f"郵便局{i}", "jpost", f"東京都千代田区{i}", f"100-{i % 10000:04d}",
+            Decimal("35.68123456"), Decimal("139.76712345"), None, 13, i % 2000,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def measure(label: str, build, rows: list) -> None:
+    started = time.perf_counter()
+    objs = build(rows)
+    elapsed = time.perf_counter() - started
+    del objs
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = build(rows)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+
+    print(f"{label:<22} rows/sec={len(rows) / elapsed:>12,.0f} bytes/row={(after - before) / len(rows):>7.1f}")
+
+
+def main() -> None:
+    """
+    Usage:
+        python scripts/benchmarks/row_materialization.py
+        python scripts/benchmarks/row_materialization.py --rows 1000000
+    """
+    parser = argparse.ArgumentParser(description="Rows/sec and bytes/row of model materialization.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    measure("dict + __init__", lambda rs: [DictFacility.from_db(r) for r in rs], rows)
+    measure("slots + row factory", Facility.from_db_rows, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,10 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.database import set_default_workload
 from core.network import get_proxy_from_env
 from core.settings import GEO_INFO_VENDORS
-from models.administration import Facility, Prefecture
+from models.administration import Facility, reference_data
 from utils.geo_info.factory import GeoInfoFactory
 
 
@@ -90,27 +91,17 @@ async def update_facilities_geo_info() -> None:
     Find all Facility rows that miss any of postcode / latitude / longtitude,
     fetch geo info for them and update the database.
     """
-    # Build prefecture id -> full_name (Japanese) map for better geocoding.
-    prefectures = Prefecture.get_all()
-    pref_by_id: Dict[int, Prefecture] = {p.pref_id: p for p in prefectures if p.pref_id}
-
-    facilities = Facility.get_without_geo_info()
-
-    if not facilities:
-        logging.info("No Facility records need geo info update.")
-        return
-
-    logging.info(f"Found {len(facilities)} Facility records missing geo info.")
-
     proxy = get_proxy_from_env()
 
+    found_count = 0
     updated_count = 0
     no_result_count = 0
     error_count = 0
 
     async with aiohttp.ClientSession() as session:
-        for facility in facilities:
-            pref = pref_by_id.get(facility.pref_id)
+        for facility in Facility.iter_without_geo_info():
+            found_count += 1
+            pref = reference_data.by_pref_id(facility.pref_id)
             prefecture_name_ja = pref.full_name if pref else ""
 
             geo = await _fetch_geo_info_for_facility(
@@ -156,8 +147,13 @@ async def update_facilities_geo_info() -> None:
             else:
                 updated_count += 1
 
+    if not found_count:
+        logging.info("No Facility records need geo info update.")
+        return
+
     logging.info(
-        "Finished daily Facility geo info update: %d updated, %d no result, %d errors",
+        "Finished daily Facility geo info update: %d found, %d updated, %d no result, %d errors",
+        found_count,
         updated_count,
         no_result_count,
         error_count,
@@ -173,6 +169,7 @@ def main() -> None:
     or:
         python scripts/crons/daily_update_geo_info.py
     """
+    set_default_workload("cron")
     asyncio.run(update_facilities_geo_info())
 
 
@@ -1,6 +1,7 @@
 import argparse
 import logging
 
+from core.database import set_default_workload
 from jpost.etl.scheduler import JPostTaskScheduler
 from manhole_card.etl.scheduler import ManholeCardTaskScheduler
 
@@ -35,6 +36,7 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = parse_args()
+    set_default_workload("etl")
 
     scheduler_cls = SCHEDULERS[args.scheduler]
     logging.info(
@@ -0,0 +1,76 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.administration import reference_data
+
+
+class CityMatcher:
+    """Aho-Corasick automaton finding the longest city name of one prefecture in a text."""
+
+    def __init__(self, cities: Iterable[Tuple[str, int]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Best (name length, -rank, city id) among the names ending at each state,
+        # including those reached through its failure links.
+        self._best: List[Optional[Tuple[int, int, int]]] = [None]
+        self.size = 0
+
+        for rank, (name, city_id) in enumerate(cities):
+            if not name:
+                continue
+            state = 0
+            for char in name:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                state = next_state
+            candidate = (len(name), -rank, city_id)
+            if self._best[state] is None or candidate > self._best[state]:
+                self._best[state] = candidate
+            self.size += 1
+
+        self._link()
+
+    def _link(self) -> None:
+        # Breadth-first, so every failure target is final before its dependants.
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited > self._best[child]):
+                    self._best[child] = inherited
+                queue.append(child)
+
+    def find(self, text: str) -> Optional[int]:
+        """Id of the longest city name found in `text`, or None."""
+        if not text or not self.size:
+            return None
+
+        goto, fail, best = self._goto, self._fail, self._best
+        found = None
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = best[state]
+            if match is not None and (found is None or match > found):
+                found = match
+        return found[2] if found else None
+
+
+def load_city_matchers() -> Dict[int, CityMatcher]:
+    """A CityMatcher per pref_id over the cities in reference_data."""
+    return {
+        pref_id: CityMatcher((city.name, city.id) for city in cities)
+        for pref_id, cities in reference_data.cities_by_pref().items()
+        if pref_id
+    }
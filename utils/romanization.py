@@ -0,0 +1,117 @@
+import logging
+import sqlite3
+import threading
+
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from core.settings import READING_CACHE_FILE
+
+
+class Romanizer:
+    """Hepburn readings of Japanese names, e.g. 札幌市 -> "Sapporoshi", cached in memory and in a sqlite file."""
+    # Bump when the conversion changes, so readings cached by older code are ignored.
+    VERSION = 1
+
+    def __init__(self, cache_file: Optional[Path] = READING_CACHE_FILE) -> None:
+        self.cache_file = cache_file
+        self._converter = None
+        self._convert_lock = threading.Lock()
+        self._memory: Dict[str, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+    def _get_converter(self):
+        if self._converter is None:
+            import pykakasi
+
+            self._converter = pykakasi.kakasi()
+        return self._converter
+
+    def _convert(self, name: str) -> str:
+        with self._convert_lock:
+            result = self._get_converter().convert(name)
+        return "".join(item["hepburn"] for item in result).capitalize()
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.cache_file is not None:
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(self.cache_file), timeout=30, check_same_thread=False)
+                db.execute("CREATE TABLE IF NOT EXISTS reading (version INTEGER, name TEXT, hepburn TEXT, PRIMARY KEY (version, name))")
+                db.commit()
+                self._db = db
+            except sqlite3.Error as e:
+                logging.warning(f"Romanizer: reading cache {self.cache_file} unavailable, using memory only: {e}")
+                self.cache_file = None
+        return self._db
+
+    def _load(self, names: list) -> Dict[str, str]:
+        found = {}
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return found
+            try:
+                # Stay under sqlite's default limit of 999 host parameters.
+                for start in range(0, len(names), 900):
+                    chunk = names[start:start + 900]
+                    rows = db.execute(
+                        f"SELECT name, hepburn FROM reading WHERE version = ? AND name IN ({', '.join(['?'] * len(chunk))})",
+                        (self.VERSION, *chunk),
+                    ).fetchall()
+                    found.update(rows)
+            except sqlite3.Error as e:
+                logging.warning(f"Romanizer: failed to read {len(names)} reading(s), converting them instead: {e}")
+                return {}
+        return found
+
+    def _store(self, readings: Dict[str, str]) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return
+            try:
+                db.executemany(
+                    "INSERT OR REPLACE INTO reading (version, name, hepburn) VALUES (?, ?, ?)",
+                    [(self.VERSION, name, hepburn) for name, hepburn in readings.items()],
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"Romanizer: failed to persist {len(readings)} reading(s): {e}")
+
+    def readings(self, names: Iterable[str]) -> Dict[str, str]:
+        """Reading of every non-empty name in `names`, keyed by name."""
+        result = {}
+        missing = []
+        for name in dict.fromkeys(name for name in names if name):
+            reading = self._memory.get(name)
+            if reading is None:
+                missing.append(name)
+            else:
+                result[name] = reading
+
+        if missing:
+            stored = self._load(missing)
+            converted = {name: self._convert(name) for name in missing if name not in stored}
+            if converted:
+                self._store(converted)
+            self._memory.update(stored)
+            self._memory.update(converted)
+            result.update(stored)
+            result.update(converted)
+        return result
+
+    def reading(self, name: str) -> str:
+        if not name:
+            return ""
+        return self.readings([name])[name]
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+romanizer = Romanizer()